@@ -1,5 +1,7 @@
 import json
 
+from catalog_stream import save_catalog
+
 def add_cast_to_specific_movies(input_file, output_file):
     """
     Add cast information to specific Tamil movies in the JSON file
@@ -57,8 +59,7 @@ def add_cast_to_specific_movies(input_file, output_file):
     
     # Save the updated data
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(movies, f, indent=2, ensure_ascii=False)
+        save_catalog(output_file, movies)
         print(f"\nUpdated movies data saved to {output_file}")
         print(f"Successfully processed {len(movies)} movies")
     except Exception as e:
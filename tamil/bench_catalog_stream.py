@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from catalog_stream import iter_catalog, write_catalog
+
+
+def make_synthetic_catalog(source_file, target_file, multiplier):
+    """
+    Write a catalog `multiplier` times larger than `source_file`, with fresh indexes
+    """
+    def records():
+        next_index = 1
+        for _ in range(multiplier):
+            for movie in iter_catalog(source_file):
+                movie = dict(movie, index=next_index)
+                next_index += 1
+                yield movie
+    return write_catalog(target_file, records())
+
+
+def copy_with_json_load(input_file, output_file):
+    with open(input_file, 'r', encoding='utf-8') as f:
+        movies = json.load(f)
+    updated_movies = []
+    for movie in movies:
+        movie.setdefault('cast', [])
+        updated_movies.append(movie)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(updated_movies, f, indent=2, ensure_ascii=False)
+
+
+def copy_with_stream(input_file, output_file):
+    def records():
+        for movie in iter_catalog(input_file):
+            movie.setdefault('cast', [])
+            yield movie
+    write_catalog(output_file, records())
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_mode(mode, input_file, output_file):
+    """
+    Run one mode in a fresh interpreter so peak RSS is measured in isolation
+    """
+    result = subprocess.run(
+        [sys.executable, __file__, '--child', mode, input_file, output_file],
+        capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def child(mode, input_file, output_file):
+    started = time.perf_counter()
+    if mode == 'json':
+        copy_with_json_load(input_file, output_file)
+    else:
+        copy_with_stream(input_file, output_file)
+    print(json.dumps({'seconds': time.perf_counter() - started, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of json.load/json.dump versus the streaming catalog reader")
+    parser.add_argument("--source", default="imdb_tamil_movies_full.json")
+    parser.add_argument("--multiplier", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        catalog = os.path.join(workdir, "catalog.json")
+        output = os.path.join(workdir, "output.json")
+        count = make_synthetic_catalog(args.source, catalog, args.multiplier)
+        size_mb = os.path.getsize(catalog) / (1024 * 1024)
+        print(f"Synthetic catalog: {count} records, {size_mb:.1f} MB ({args.multiplier}x {args.source})")
+        print("=" * 60)
+        for mode in ('json', 'stream'):
+            result = run_mode(mode, catalog, output)
+            print(f"{mode:>6}: {result['seconds']:6.1f}s  peak RSS {result['peak_rss_mb']:8.1f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        child(*sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_catalog_stream import peak_rss_mb
+from catalog_stream import iter_catalog, write_catalog
+from omdb_stub import StubCorpus, StubOptions, start_stub
+from scheduler import DETAIL_FIELDS
+
+BENCH_KEY = "benchkey"
+
+
+def make_fixtures(source_file, corpus_file, input_file, multiplier):
+    """
+    Write a corpus `multiplier` times larger than `source_file` and the matching
+    catalog to enrich. Copies get their own titles so every record is a distinct lookup.
+    """
+    def corpus():
+        next_index = 1
+        for copy in range(1, multiplier + 1):
+            for movie in iter_catalog(source_file):
+                title = movie.get('title')
+                if title and copy > 1:
+                    title = f"{title} {copy}"
+                yield dict(movie, index=next_index, title=title)
+                next_index += 1
+
+    def to_enrich():
+        for movie in iter_catalog(corpus_file):
+            yield {k: v for k, v in movie.items() if k not in DETAIL_FIELDS}
+
+    write_catalog(corpus_file, corpus(), indent=None)
+    return write_catalog(input_file, to_enrich(), indent=None)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def run_size(workdir, url, input_file, args):
+    """
+    Enrich one catalog in a fresh interpreter, so peak RSS is measured in isolation
+    The child runs in `workdir` and gets its own response cache and key usage files.
+    """
+    with open(os.path.join(workdir, "omdb_keys.json"), 'w', encoding='utf-8') as f:
+        json.dump({'daily_limit': 10 ** 9, 'keys': [BENCH_KEY]}, f)
+    command = [sys.executable, os.path.abspath(__file__), '--child', input_file,
+               os.path.join(workdir, "output.json"), str(args.max_requests or 10 ** 9),
+               str(args.concurrency), str(args.rate), 'stream' if args.stream else 'batch']
+    result = subprocess.run(command, cwd=workdir, env=dict(os.environ, OMDB_URL=url),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def child(input_file, output_file, max_requests, concurrency, rate, mode):
+    import enrichment_engine
+    import update_movies_with_details
+
+    latencies = []
+
+    def timed_lookup(title, year, cache_only=False):
+        if cache_only:
+            return update_movies_with_details.lookup_movie_details(title, year, cache_only=True)
+        started = time.perf_counter()
+        outcome = update_movies_with_details.lookup_movie_details(title, year)
+        latencies.append(time.perf_counter() - started)
+        return outcome
+
+    update = (enrichment_engine.update_movies_streaming if mode == 'stream'
+              else enrichment_engine.update_movies_concurrently)
+    started = time.perf_counter()
+    update(input_file, output_file, lookup_details=timed_lookup, max_requests=int(max_requests),
+           concurrency=int(concurrency), requests_per_second=float(rate), check_posters=False)
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    print(json.dumps({
+        'lookups': len(latencies),
+        'seconds': seconds,
+        'records_per_second': len(latencies) / seconds if seconds else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': peak_rss_mb()
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the enrichment pipeline against the local OMDB stub")
+    parser.add_argument("--source", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--multipliers", default="1,10,100", help="Catalog sizes to run, as multiples of --source")
+    parser.add_argument("--max-requests", type=int, help="Cap the lookups per run (default: every record)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=1000, help="Requests per second")
+    parser.add_argument("--stream", action="store_true", help="Benchmark the streaming engine")
+    parser.add_argument("--latency", type=float, default=0.005, help="Stub latency per answer in seconds")
+    parser.add_argument("--jitter", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'lookups':>8} {'seconds':>8} {'rec/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+    print("=" * 60)
+    for multiplier in [int(m) for m in args.multipliers.split(',')]:
+        with tempfile.TemporaryDirectory() as workdir:
+            corpus_file = os.path.join(workdir, "corpus.json")
+            input_file = os.path.join(workdir, "input.json")
+            make_fixtures(args.source, corpus_file, input_file, multiplier)
+
+            options = StubOptions(args.latency, args.jitter, args.error_rate, args.throttle_rate,
+                                  retry_after=0, seed=args.seed)
+            server, url = start_stub(StubCorpus.load(corpus_file), options=options)
+            try:
+                result = run_size(workdir, url, input_file, args)
+            finally:
+                server.shutdown()
+                server.server_close()
+            print(f"{str(multiplier) + 'x':>6} {result['lookups']:>8} {result['seconds']:>8.1f} "
+                  f"{result['records_per_second']:>8.1f} {result['p50_ms']:>8.1f} "
+                  f"{result['p99_ms']:>8.1f} {result['peak_rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 8 and sys.argv[1] == '--child':
+        child(*sys.argv[2:])
+    else:
+        main()
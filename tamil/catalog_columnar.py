@@ -0,0 +1,307 @@
+import argparse
+import bisect
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+
+from catalog_stream import atomic_write_bytes, iter_catalog
+
+MAGIC = b"TMCAT1\0\0"
+ALIGN = 8
+
+# Fields with a column of their own, in the order records are rebuilt
+FIELDS = ['index', 'title', 'year', 'rating', 'image', 'cast', 'director', 'poster',
+          'released', 'runtime', 'genre', 'writer', 'plot', 'awards']
+STRING_FIELDS = ['title', 'image', 'poster', 'released', 'runtime', 'genre', 'writer', 'plot', 'awards']
+FIELD_BITS = {field: 1 << bit for bit, field in enumerate(FIELDS)}
+
+RATING_PATTERN = re.compile(r'\d{1,3}\.\d')
+MISSING = object()
+
+# Typecodes of the fixed-width sections; the blobs are raw UTF-8
+SECTION_TYPES = {'presence': 'I', 'index': 'i', 'year': 'h', 'rating': 'H', 'director': 'i',
+                 'cast.offsets': 'I', 'cast.ids': 'i'}
+SECTION_TYPES.update({field + '.offsets': 'I' for field in STRING_FIELDS + ['people', 'extra']})
+
+
+def encode_fixed(field, value):
+    """
+    The fixed-width encoding of index/year/rating, or MISSING if the value
+    would not come back unchanged (those go to the record's extra JSON)
+    """
+    if field == 'index':
+        return value if type(value) is int and -2 ** 31 <= value < 2 ** 31 else MISSING
+    if field == 'year':
+        if isinstance(value, str) and value.isdigit() and str(int(value)) == value and int(value) < 2 ** 15:
+            return int(value)
+        return MISSING
+    if isinstance(value, str) and RATING_PATTERN.fullmatch(value) and value == f"{int(value.replace('.', '')) / 10:.1f}":
+        return int(value.replace('.', ''))
+    return MISSING
+
+
+class StringColumn:
+    """
+    uint32 offsets (one per record plus one) into a UTF-8 blob
+    """
+    def __init__(self):
+        self.offsets = array('I', [0])
+        self.blob = bytearray()
+
+    def append(self, text):
+        self.blob += text.encode('utf-8')
+        self.offsets.append(len(self.blob))
+
+
+def build_columns(movies):
+    """
+    Split records into columns; returns (record count, {section name: bytes}, people count)
+    """
+    presence = array('I')
+    fixed = {'index': array('i'), 'year': array('h'), 'rating': array('H')}
+    strings = {field: StringColumn() for field in STRING_FIELDS}
+    people = {}
+    people_names = StringColumn()
+    director = array('i')
+    cast_offsets = array('I', [0])
+    cast_ids = array('i')
+    extra = StringColumn()
+
+    def person(name):
+        if name not in people:
+            people[name] = len(people)
+            people_names.append(name)
+        return people[name]
+
+    count = 0
+    for movie in movies:
+        count += 1
+        bits = 0
+        leftovers = {}
+        for field, value in movie.items():
+            if field in fixed:
+                encoded = encode_fixed(field, value)
+                if encoded is not MISSING:
+                    bits |= FIELD_BITS[field]
+                    fixed[field].append(encoded)
+                    continue
+            elif field in strings and isinstance(value, str):
+                bits |= FIELD_BITS[field]
+                strings[field].append(value)
+                continue
+            elif field == 'director' and isinstance(value, str):
+                bits |= FIELD_BITS[field]
+                director.append(person(value))
+                continue
+            elif field == 'cast' and isinstance(value, list) and all(isinstance(v, str) for v in value):
+                bits |= FIELD_BITS[field]
+                cast_ids.extend(person(name) for name in value)
+                cast_offsets.append(len(cast_ids))
+                continue
+            leftovers[field] = value
+
+        # Every column has one entry per record, absent values are placeholders
+        for field, column in fixed.items():
+            if not bits & FIELD_BITS[field]:
+                column.append(0)
+        for field, column in strings.items():
+            if not bits & FIELD_BITS[field]:
+                column.append('')
+        if not bits & FIELD_BITS['director']:
+            director.append(-1)
+        if not bits & FIELD_BITS['cast']:
+            cast_offsets.append(len(cast_ids))
+        presence.append(bits)
+        extra.append(json.dumps(leftovers, ensure_ascii=False, separators=(',', ':')) if leftovers else '')
+
+    sections = {'presence': presence.tobytes()}
+    for field, column in fixed.items():
+        sections[field] = column.tobytes()
+    for field, column in list(strings.items()) + [('people', people_names), ('extra', extra)]:
+        sections[field + '.offsets'] = column.offsets.tobytes()
+        sections[field + '.blob'] = bytes(column.blob)
+    sections['director'] = director.tobytes()
+    sections['cast.offsets'] = cast_offsets.tobytes()
+    sections['cast.ids'] = cast_ids.tobytes()
+    return count, sections, len(people)
+
+
+def write_columnar(catalog_file, path=None):
+    """
+    Convert a JSON catalog to the columnar format
+    Layout: magic, uint32 header length, JSON header with the offset and
+    length of every section, then the sections, each 8-byte aligned. Numbers
+    are stored in native byte order, which the reader requires to be little-endian.
+    """
+    path = path or os.path.splitext(catalog_file)[0] + ".tmcat"
+    count, sections, people = build_columns(iter_catalog(catalog_file))
+
+    def layout(header_size):
+        position = len(MAGIC) + 4 + header_size
+        table = {}
+        for name, data in sections.items():
+            position += -position % ALIGN
+            table[name] = [position, len(data)]
+            position += len(data)
+        return table
+
+    # The header holds the section offsets, which depend on the header size;
+    # grow the reserved space until the header fits, then pad it with spaces
+    header = {'records': count, 'people': people, 'fields': FIELDS}
+    reserved = 0
+    while True:
+        header['sections'] = layout(reserved)
+        header_bytes = json.dumps(header).encode('utf-8')
+        if len(header_bytes) <= reserved:
+            break
+        reserved = len(header_bytes) + 64
+    header_bytes = header_bytes.ljust(reserved)
+
+    out = bytearray(MAGIC + struct.pack('<I', reserved) + header_bytes)
+    for name, data in sections.items():
+        out += b'\0' * (header['sections'][name][0] - len(out))
+        out += data
+    atomic_write_bytes(path, bytes(out))
+    print(f"Wrote {count} movies, {people} people to {path} ({len(out)} bytes)")
+    return path
+
+
+class ColumnarCatalog:
+    """
+    Read-only view of a .tmcat file
+    The file is memory-mapped, so opening it costs next to nothing and every
+    process reading the same file shares one copy in the page cache. Records
+    are only turned into dicts when asked for; single columns can be read
+    without building records at all.
+    """
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise ValueError("The columnar catalog is little-endian, this machine is not")
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not a columnar catalog")
+        (header_size,) = struct.unpack_from('<I', self.map, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(self.map[start:start + header_size]))
+        self.count = self.header['records']
+        self.view = memoryview(self.map)
+        self.sections = {}
+        for name, (offset, length) in self.header['sections'].items():
+            section = self.view[offset:offset + length]
+            if name in SECTION_TYPES:
+                section = section.cast(SECTION_TYPES[name])
+            self.sections[name] = section
+        self.positions = None
+
+    def close(self):
+        self.sections = {}
+        self.view.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def string(self, column, position):
+        offsets = self.sections[column + '.offsets']
+        return bytes(self.sections[column + '.blob'][offsets[position]:offsets[position + 1]]).decode('utf-8')
+
+    def person(self, person_id):
+        return self.string('people', person_id)
+
+    def value(self, field, position):
+        """
+        One field of one record, MISSING if the record does not have it
+        """
+        if not self.sections['presence'][position] & FIELD_BITS[field]:
+            extra = self.extra(position)
+            return extra.get(field, MISSING)
+        if field == 'index':
+            return self.sections['index'][position]
+        if field == 'year':
+            return str(self.sections['year'][position])
+        if field == 'rating':
+            return f"{self.sections['rating'][position] / 10:.1f}"
+        if field == 'director':
+            return self.person(self.sections['director'][position])
+        if field == 'cast':
+            offsets = self.sections['cast.offsets']
+            ids = self.sections['cast.ids']
+            return [self.person(ids[i]) for i in range(offsets[position], offsets[position + 1])]
+        return self.string(field, position)
+
+    def extra(self, position):
+        text = self.string('extra', position)
+        return json.loads(text) if text else {}
+
+    def __getitem__(self, position):
+        """
+        Build the record at `position` (file order)
+        """
+        if not -self.count <= position < self.count:
+            raise IndexError(position)
+        position %= self.count
+        bits = self.sections['presence'][position]
+        extra = self.extra(position)
+        movie = {}
+        for field in FIELDS:
+            if bits & FIELD_BITS[field]:
+                movie[field] = self.value(field, position)
+            elif field in extra:
+                movie[field] = extra.pop(field)
+        movie.update(extra)
+        return movie
+
+    def __iter__(self):
+        for position in range(self.count):
+            yield self[position]
+
+    def get(self, index):
+        """
+        The record with this `index`, or None
+        """
+        if self.positions is None:
+            column = self.sections['index']
+            presence = self.sections['presence']
+            indexes = [column[p] if presence[p] & FIELD_BITS['index'] else None for p in range(self.count)]
+            if all(i is not None for i in indexes) and all(a < b for a, b in zip(indexes, indexes[1:])):
+                self.positions = indexes
+            else:
+                self.positions = {i: p for p, i in enumerate(indexes) if i is not None}
+        if isinstance(self.positions, dict):
+            position = self.positions.get(index)
+        else:
+            position = bisect.bisect_left(self.positions, index)
+            if position == len(self.positions) or self.positions[position] != index:
+                position = None
+        return None if position is None else self[position]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the catalog to the memory-mapped columnar format")
+    parser.add_argument("catalog", nargs="?", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--out", help="Output file (defaults to the catalog name with .tmcat)")
+    parser.add_argument("--check", action="store_true", help="Verify every record reads back unchanged")
+    args = parser.parse_args()
+
+    path = write_columnar(args.catalog, args.out)
+    started = time.perf_counter()
+    catalog = ColumnarCatalog(path)
+    print(f"Opened {len(catalog)} movies in {(time.perf_counter() - started) * 1000:.2f} ms")
+    if args.check:
+        mismatches = sum(1 for movie, stored in zip(iter_catalog(args.catalog), catalog) if movie != stored)
+        print(f"Round trip: {mismatches} records differ")
+    catalog.close()
@@ -0,0 +1,389 @@
+import argparse
+import json
+import sqlite3
+import threading
+import time
+
+from catalog_merge import is_empty
+from catalog_stream import iter_catalog, write_catalog
+from search_index import tokenize
+
+DEFAULT_DB_FILE = "movies.sqlite3"
+
+# Catalog field -> column; every other field goes to the record's extra JSON
+COLUMNS = {
+    'index': 'idx', 'title': 'title', 'year': 'year', 'rating': 'rating', 'image': 'image',
+    'poster': 'poster', 'cast': 'cast_list', 'director': 'director', 'writer': 'writer',
+    'genre': 'genre', 'plot': 'plot', 'released': 'released', 'runtime': 'runtime', 'awards': 'awards'
+}
+
+# Fields written to each of the JSON files the pages and updaters read
+EXPORT_FIELDS = {
+    'full': ['index', 'title', 'year', 'rating', 'image'],
+    'cast': ['index', 'title', 'year', 'rating', 'image', 'cast', 'director', 'poster'],
+    'all': None
+}
+
+ORDERS = {
+    'index': "idx",
+    'year': "year DESC, idx",
+    'rating': "rating DESC, idx",
+    'title': "title COLLATE NOCASE, idx"
+}
+
+# Rows read per query while iterating, so a full pass never holds the whole catalog
+PAGE_SIZE = 500
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS movies (
+        idx INTEGER PRIMARY KEY,
+        title TEXT,
+        year INTEGER,
+        rating REAL,
+        image TEXT,
+        poster TEXT,
+        cast_list TEXT,
+        director TEXT,
+        writer TEXT,
+        genre TEXT,
+        plot TEXT,
+        released TEXT,
+        runtime TEXT,
+        awards TEXT,
+        fields TEXT NOT NULL,
+        extra TEXT,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS movies_year ON movies (year);
+    CREATE INDEX IF NOT EXISTS movies_rating ON movies (rating);
+    CREATE INDEX IF NOT EXISTS movies_director ON movies (director COLLATE NOCASE);
+"""
+
+
+def encode_value(field, value):
+    """
+    The column value of one field, or KeyError if the column cannot hold it
+    unchanged (year and rating are kept as strings in the catalog)
+    """
+    if field == 'year':
+        if isinstance(value, str) and value.isdigit() and str(int(value)) == value:
+            return int(value)
+    elif field == 'rating':
+        if isinstance(value, str) and value.replace('.', '', 1).isdigit() and f"{float(value):.1f}" == value:
+            return float(value)
+    elif field == 'cast':
+        if isinstance(value, list) and all(isinstance(name, str) for name in value):
+            return json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, str) or (field == 'index' and type(value) is int):
+        return value
+    if value is None and field != 'index':
+        return None
+    raise KeyError(field)
+
+
+def decode_value(field, value):
+    if value is None:
+        return None
+    if field == 'year':
+        return str(value)
+    if field == 'rating':
+        return f"{value:.1f}"
+    if field == 'cast':
+        return json.loads(value)
+    return value
+
+
+def movie_to_row(movie):
+    """
+    Column values for a catalog record
+    The record's field order and any value the typed columns cannot hold
+    are kept too, so movie_from_row gives back exactly the same dict
+    """
+    if type(movie.get('index')) is not int:
+        raise ValueError(f"Movie has no integer index: {movie.get('title')!r}")
+    row = {column: None for column in COLUMNS.values()}
+    extra = {}
+    for field, value in movie.items():
+        try:
+            row[COLUMNS[field]] = encode_value(field, value)
+        except KeyError:
+            extra[field] = value
+    row['fields'] = json.dumps(list(movie), ensure_ascii=False)
+    row['extra'] = json.dumps(extra, ensure_ascii=False) if extra else None
+    return row
+
+
+def movie_from_row(row):
+    extra = json.loads(row['extra']) if row['extra'] else {}
+    movie = {}
+    for field in json.loads(row['fields']):
+        if field in extra:
+            movie[field] = extra[field]
+        else:
+            movie[field] = decode_value(field, row[COLUMNS[field]])
+    return movie
+
+
+def fts_query(text):
+    """
+    FTS5 query matching every word of `text` as a prefix
+    """
+    return ' '.join(f'"{token}"*' for token in tokenize(text))
+
+
+class CatalogDB:
+    """
+    The movie catalog in SQLite, one row per movie
+    Year, rating and director are indexed columns, title, cast and plot are
+    searchable through an FTS5 table. Every write is its own transaction, so
+    enriching a movie updates one row instead of rewriting a JSON file; the
+    JSON files become build artifacts written by export_json.
+    """
+    def __init__(self, path=DEFAULT_DB_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # Python builds without FTS5 still get a working catalog, search falls back to LIKE
+        try:
+            self.conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts
+                USING fts5(title, cast_list, plot, tokenize='unicode61 remove_diacritics 2')
+            """)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+
+    def __contains__(self, index):
+        return self.get(index) is not None
+
+    def write_row(self, movie):
+        """
+        Insert or replace one movie; the caller holds the lock and commits
+        """
+        row = movie_to_row(movie)
+        row['updated_at'] = time.time()
+        columns = ', '.join(row)
+        self.conn.execute(f"INSERT OR REPLACE INTO movies ({columns}) VALUES ({', '.join('?' * len(row))})",
+                          list(row.values()))
+        if self.fts:
+            self.conn.execute("DELETE FROM movies_fts WHERE rowid = ?", (movie['index'],))
+            self.conn.execute("INSERT INTO movies_fts (rowid, title, cast_list, plot) VALUES (?, ?, ?, ?)",
+                              (movie['index'], movie.get('title') or '',
+                               ', '.join(movie.get('cast') or []) if isinstance(movie.get('cast'), list) else '',
+                               movie.get('plot') or ''))
+
+    def get(self, index):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM movies WHERE idx = ?", (index,)).fetchone()
+        return movie_from_row(row) if row else None
+
+    def put(self, movie):
+        """
+        Store a whole record, replacing any movie with the same index
+        """
+        with self.lock, self.conn:
+            self.write_row(movie)
+
+    def update(self, index, fields):
+        """
+        Merge `fields` into one movie in a single transaction and return the record
+        """
+        return self.update_many([(index, fields)])[0]
+
+    def update_many(self, updates):
+        """
+        Merge (index, fields) pairs into their movies, all in one transaction
+        """
+        updated = []
+        with self.lock, self.conn:
+            for index, fields in updates:
+                row = self.conn.execute("SELECT * FROM movies WHERE idx = ?", (index,)).fetchone()
+                if row is None:
+                    raise KeyError(index)
+                movie = movie_from_row(row)
+                movie.update(fields)
+                self.write_row(movie)
+                updated.append(movie)
+        return updated
+
+    def delete(self, index):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM movies WHERE idx = ?", (index,))
+            if self.fts:
+                self.conn.execute("DELETE FROM movies_fts WHERE rowid = ?", (index,))
+
+    def select(self, where="", params=(), order='index', limit=None):
+        """
+        Movies matching an SQL condition on the movie columns, read a page at a time
+        """
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order {order!r}, expected one of {', '.join(ORDERS)}")
+        sql = "SELECT * FROM movies" + (f" WHERE {where}" if where else "") + f" ORDER BY {ORDERS[order]}"
+        offset = 0
+        while limit is None or offset < limit:
+            size = PAGE_SIZE if limit is None else min(PAGE_SIZE, limit - offset)
+            with self.lock:
+                rows = self.conn.execute(f"{sql} LIMIT ? OFFSET ?", list(params) + [size, offset]).fetchall()
+            for row in rows:
+                yield movie_from_row(row)
+            if len(rows) < size:
+                return
+            offset += len(rows)
+
+    def __iter__(self):
+        return self.select()
+
+    def movies(self):
+        """
+        Every record in stable index order
+        """
+        return list(self.select())
+
+    def query(self, year=None, min_year=None, max_year=None, min_rating=None, director=None,
+              order='index', limit=None):
+        """
+        Movies filtered on the indexed columns, e.g. query(min_year=2020, min_rating=7, order='rating')
+        `director` matches one name of the (comma separated) director field, ignoring case
+        """
+        conditions = []
+        params = []
+        if year is not None:
+            conditions.append("year = ?")
+            params.append(int(year))
+        if min_year is not None:
+            conditions.append("year >= ?")
+            params.append(int(min_year))
+        if max_year is not None:
+            conditions.append("year <= ?")
+            params.append(int(max_year))
+        if min_rating is not None:
+            conditions.append("rating >= ?")
+            params.append(float(min_rating))
+        if director:
+            # The equality test uses the director index, the LIKE catches co-directors
+            conditions.append("(director = ? COLLATE NOCASE OR ', ' || director || ',' LIKE ?)")
+            params.extend([director, f"%, {director},%"])
+        return list(self.select(' AND '.join(conditions), params, order, limit))
+
+    def search(self, text, limit=20):
+        """
+        Movies whose title, cast or plot contain every word of `text` (as a
+        prefix), best matches first
+        """
+        if not tokenize(text):
+            return []
+        with self.lock:
+            if self.fts:
+                rows = self.conn.execute("""
+                    SELECT movies.* FROM movies_fts JOIN movies ON movies.idx = movies_fts.rowid
+                    WHERE movies_fts MATCH ? ORDER BY movies_fts.rank LIMIT ?
+                """, (fts_query(text), limit)).fetchall()
+            else:
+                rows = self.conn.execute("SELECT * FROM movies WHERE title LIKE ? ORDER BY idx LIMIT ?",
+                                         (f"%{text.strip()}%", limit)).fetchall()
+        return [movie_from_row(row) for row in rows]
+
+    def import_catalog(self, path, replace=False):
+        """
+        Load a JSON catalog in one transaction
+        Non-empty fields in the file overwrite those already stored for the
+        same index; empty ones ('', [], null, N/A) and fields it lacks never
+        replace a stored value. With `replace`, the file's records replace
+        the stored ones and movies missing from it are deleted.
+        """
+        count = 0
+        with self.lock, self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM movies")
+                if self.fts:
+                    self.conn.execute("DELETE FROM movies_fts")
+            for movie in iter_catalog(path):
+                row = self.conn.execute("SELECT * FROM movies WHERE idx = ?", (movie.get('index'),)).fetchone()
+                if row is not None:
+                    stored = movie_from_row(row)
+                    # One copy's lost cast list must not wipe the cast another copy has
+                    for field, value in movie.items():
+                        if field not in stored or not is_empty(value):
+                            stored[field] = value
+                    movie = stored
+                self.write_row(movie)
+                count += 1
+        print(f"Imported {count} movies from {path} into {self.path}")
+        return count
+
+    def export_json(self, path, fields=None, indent=2):
+        """
+        Write the catalog as a JSON array in index order, streamed row by row
+        `fields` limits each record to those fields (see EXPORT_FIELDS)
+        """
+        records = self.select()
+        if fields is not None:
+            records = ({field: movie[field] for field in fields if field in movie} for movie in records)
+        count = write_catalog(path, records, indent)
+        print(f"Exported {count} movies to {path}")
+        return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite movie catalog: import, export, query and search")
+    parser.add_argument("--db", default=DEFAULT_DB_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Load JSON catalogs, later non-empty values win field by field")
+    import_parser.add_argument("catalogs", nargs="+")
+    import_parser.add_argument("--replace", action="store_true", help="Start from an empty catalog")
+
+    export_parser = commands.add_parser("export", help="Write the catalog as a JSON file")
+    export_parser.add_argument("output")
+    export_parser.add_argument("--fields", default="all",
+                               help=f"{', '.join(EXPORT_FIELDS)} or a comma separated list of fields")
+    export_parser.add_argument("--minify", action="store_true")
+
+    query_parser = commands.add_parser("query", help="Filter on year, rating and director")
+    query_parser.add_argument("--year", type=int)
+    query_parser.add_argument("--min-year", type=int)
+    query_parser.add_argument("--max-year", type=int)
+    query_parser.add_argument("--min-rating", type=float)
+    query_parser.add_argument("--director")
+    query_parser.add_argument("--order", choices=sorted(ORDERS), default="index")
+    query_parser.add_argument("--limit", type=int, default=20)
+
+    search_parser = commands.add_parser("search", help="Full-text search over title, cast and plot")
+    search_parser.add_argument("text")
+    search_parser.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+    with CatalogDB(args.db) as db:
+        if args.command == "import":
+            for i, catalog in enumerate(args.catalogs):
+                db.import_catalog(catalog, replace=args.replace and i == 0)
+        elif args.command == "export":
+            fields = EXPORT_FIELDS[args.fields] if args.fields in EXPORT_FIELDS else args.fields.split(',')
+            db.export_json(args.output, fields, None if args.minify else 2)
+        else:
+            if args.command == "query":
+                movies = db.query(args.year, args.min_year, args.max_year, args.min_rating, args.director,
+                                  args.order, args.limit)
+            else:
+                movies = db.search(args.text, args.limit)
+            for movie in movies:
+                print(f"{movie['index']:>5}  {movie.get('title')} ({movie.get('year') or '?'})"
+                      f"  {movie.get('rating') or '-'}  {movie.get('director') or ''}")
@@ -0,0 +1,135 @@
+import argparse
+import hashlib
+import json
+import os
+
+from catalog_stream import atomic_write_bytes, iter_catalog
+
+# How many deltas to keep; clients further behind download the full snapshot
+KEEP_DELTAS = 30
+
+
+def record_hash(record):
+    """
+    Content hash of one record, independent of key order and formatting
+    """
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def state_path_for(out_dir, stem):
+    return os.path.join(out_dir, stem + ".versions.json")
+
+
+def delta_name(stem, version):
+    return f"{stem}.delta.{version}.json"
+
+
+def load_state(out_dir, stem):
+    try:
+        with open(state_path_for(out_dir, stem), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'version': 0, 'hashes': {}, 'deltas': []}
+
+
+def diff_catalog(records, old_hashes):
+    """
+    Compare records against the hashes of the previous version
+    Returns (added, changed, removed, new_hashes, order) where order lists
+    the indexes in file order; only changed records are kept in memory
+    """
+    added = []
+    changed = []
+    new_hashes = {}
+    order = []
+    for record in records:
+        order.append(record.get('index'))
+        key = str(record.get('index'))
+        digest = record_hash(record)
+        new_hashes[key] = digest
+        if key not in old_hashes:
+            added.append(record)
+        elif old_hashes[key] != digest:
+            changed.append(record)
+    removed = sorted((int(key) if key.isdigit() else key) for key in old_hashes if key not in new_hashes)
+    return added, changed, removed, new_hashes, order
+
+
+def in_index_order(order):
+    return all((a or 0) <= (b or 0) for a, b in zip(order, order[1:]))
+
+
+def publish_delta(catalog_file, out_dir=None, stem=None):
+    """
+    Publish the changes in `catalog_file` since the last published version
+    Writes <stem>.delta.<N>.json holding the added, changed and removed
+    records between version N-1 and N, and returns the new state. If the
+    catalog is not in index order the delta also lists its order, so a
+    patched copy matches the snapshot record for record.
+    Nothing is written when no record changed. The delta is published next
+    to the full snapshot catalog_export writes, it does not replace it.
+    """
+    out_dir = out_dir or os.path.dirname(os.path.abspath(catalog_file))
+    stem = stem or os.path.splitext(os.path.basename(catalog_file))[0]
+    state = load_state(out_dir, stem)
+
+    added, changed, removed, new_hashes, order = diff_catalog(iter_catalog(catalog_file), state['hashes'])
+    if not (added or changed or removed):
+        print(f"No changes since version {state['version']}, nothing to publish")
+        return state
+
+    version = state['version'] + 1
+    delta = {
+        'from_version': state['version'],
+        'version': version,
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'order': None if in_index_order(order) else order
+    }
+    # The first version has no base to patch, clients take the full snapshot
+    if state['version'] > 0:
+        atomic_write_bytes(os.path.join(out_dir, delta_name(stem, version)),
+                           json.dumps(delta, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        state['deltas'].append(version)
+
+    for old_version in state['deltas'][:-KEEP_DELTAS]:
+        try:
+            os.remove(os.path.join(out_dir, delta_name(stem, old_version)))
+        except FileNotFoundError:
+            pass
+    state = {
+        'version': version,
+        'hashes': new_hashes,
+        'deltas': state['deltas'][-KEEP_DELTAS:]
+    }
+    atomic_write_bytes(state_path_for(out_dir, stem),
+                       json.dumps(state, separators=(',', ':')).encode('utf-8'))
+
+    print(f"Published version {version}: {len(added)} added, {len(changed)} changed, {len(removed)} removed")
+    return state
+
+
+def apply_delta(records, delta):
+    """
+    Patch a list of records from version delta['from_version'] to delta['version']
+    The result is in the order of that version's snapshot: the order the
+    delta lists, index order if it lists none
+    """
+    by_index = {record.get('index'): record for record in records}
+    for index in delta['removed']:
+        by_index.pop(index, None)
+    for record in delta['added'] + delta['changed']:
+        by_index[record.get('index')] = record
+    if delta.get('order') is not None:
+        return [by_index[index] for index in delta['order']]
+    return sorted(by_index.values(), key=lambda x: x.get('index', 0))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish the records changed since the last catalog version")
+    parser.add_argument("catalog", nargs="?", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--out-dir", help="Directory to publish into (defaults to the catalog's directory)")
+    args = parser.parse_args()
+    publish_delta(args.catalog, args.out_dir)
@@ -0,0 +1,112 @@
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from catalog_delta import publish_delta
+from catalog_shards import MANIFEST_NAME, SHARD_DIR, write_movie_shards
+from catalog_stream import atomic_write_bytes
+from search_index import write_search_index
+
+# How many older hashed files to keep for clients still holding an old manifest
+KEEP_PREVIOUS = 1
+
+
+def minify(movies):
+    return json.dumps(movies, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def prune_hashed_files(directory, stem, keep):
+    """
+    Remove hashed exports of `stem` other than the `keep` names (and their .gz/.br)
+    """
+    for path in glob.glob(os.path.join(directory, f"{stem}.*.min.json*")):
+        name = os.path.basename(path)
+        base = name[:-3] if name.endswith(('.gz', '.br')) else name
+        if base not in keep:
+            os.remove(path)
+
+
+def export_catalog(catalog_file, out_dir=None):
+    """
+    Publish a catalog for the web frontends
+    Writes <stem>.<hash>.min.json with .gz and .br siblings, and a small
+    <stem>.manifest.json pointing at it. The hashed files never change once
+    written, so browsers and CDNs can cache them for as long as they like.
+    The manifest also carries the catalog version and the deltas published
+    by catalog_delta, so returning clients can patch instead of re-downloading.
+    The search index and the per-movie shards for the pages are rebuilt next to it.
+    """
+    with open(catalog_file, 'r', encoding='utf-8') as f:
+        movies = json.load(f)
+
+    out_dir = out_dir or os.path.dirname(os.path.abspath(catalog_file))
+    stem = os.path.splitext(os.path.basename(catalog_file))[0]
+    data = minify(movies)
+    content_hash = hashlib.sha256(data).hexdigest()[:12]
+    file_name = f"{stem}.{content_hash}.min.json"
+    target = os.path.join(out_dir, file_name)
+
+    # Same hash, same bytes: an unchanged catalog is not rewritten or recompressed,
+    # each file is checked on its own so a missing sibling is still written
+    if not os.path.exists(target):
+        atomic_write_bytes(target, data)
+    if not os.path.exists(target + ".gz"):
+        atomic_write_bytes(target + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        if not os.path.exists(target + ".br"):
+            atomic_write_bytes(target + ".br", brotli.compress(data, quality=11))
+    else:
+        print("brotli is not installed, skipping the .br file (pip install brotli)")
+
+    state = publish_delta(catalog_file, out_dir, stem)
+    search_file = write_search_index(catalog_file, out_dir, movies)
+    write_movie_shards(catalog_file, out_dir)
+
+    manifest_file = os.path.join(out_dir, stem + ".manifest.json")
+    previous = []
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            old_manifest = json.load(f)
+        previous = old_manifest.get('previous', [])
+        if old_manifest['file'] != file_name:
+            previous = [old_manifest['file']] + previous
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    previous = previous[:KEEP_PREVIOUS]
+
+    manifest = {
+        'file': file_name,
+        'hash': content_hash,
+        'records': len(movies),
+        'bytes': len(data),
+        'gzip_bytes': os.path.getsize(target + ".gz"),
+        'brotli_bytes': os.path.getsize(target + ".br") if brotli is not None else None,
+        'version': state['version'],
+        'deltas': state['deltas'],
+        'search': os.path.basename(search_file),
+        'shards': f"{SHARD_DIR}/{MANIFEST_NAME}",
+        'previous': previous
+    }
+    atomic_write_bytes(manifest_file, json.dumps(manifest, indent=2).encode('utf-8'))
+    prune_hashed_files(out_dir, stem, [file_name] + previous)
+
+    print(f"Exported {len(movies)} movies to {target}")
+    print(f"  minified: {manifest['bytes']} bytes, gzip: {manifest['gzip_bytes']} bytes"
+          + (f", brotli: {manifest['brotli_bytes']} bytes" if brotli is not None else ""))
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the minified, precompressed and content-hashed catalog")
+    parser.add_argument("catalog", nargs="?", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--out-dir", help="Directory to publish into (defaults to the catalog's directory)")
+    args = parser.parse_args()
+    export_catalog(args.catalog, args.out_dir)
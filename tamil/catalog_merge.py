@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+from collections import Counter
+
+from catalog_stream import CatalogWriter, iter_catalog
+
+# How a field's value is picked when the copies disagree:
+# non_empty - the newest copy with a non-empty value wins
+# newest - the newest copy that has the field wins, even if its value is empty
+RULES = ('non_empty', 'newest')
+DEFAULT_RULE = 'non_empty'
+FIELD_RULES = {}
+
+EMPTY_VALUES = (None, '', 'N/A', [], {})
+
+
+def is_empty(value):
+    return any(value == empty and type(value) is type(empty) for empty in EMPTY_VALUES)
+
+
+def rank_inputs(paths, by='order'):
+    """
+    Order the inputs from oldest to newest fetch: as given (the last path is
+    the newest), or by file modification time with by='mtime'
+    A git checkout gives every file the same mtime, so 'mtime' only helps
+    for copies written by the updaters themselves.
+    """
+    if by == 'mtime':
+        return sorted(paths, key=os.path.getmtime)
+    return list(paths)
+
+
+def group_by_index(paths):
+    """
+    Read every catalog once, oldest first, and group the copies of each movie
+    Returns ({index: [(rank, record), ...]}, records without an index); the
+    inputs can be in any order.
+    """
+    versions = {}
+    without_index = []
+    for rank, path in enumerate(paths):
+        for movie in iter_catalog(path):
+            index = movie.get('index')
+            if index is None:
+                without_index.append(movie)
+            else:
+                versions.setdefault(index, []).append((rank, movie))
+    return versions, without_index
+
+
+def merge_versions(versions, sources, rules=None):
+    """
+    Merge the copies of one movie, `versions` being (rank, record) oldest first
+    Returns (record, conflicts) where each conflict lists the distinct
+    non-empty values a field had and which copy's value was kept.
+    """
+    rules = rules or {}
+    merged = {}
+    conflicts = []
+    fields = list(dict.fromkeys(field for _, movie in versions for field in movie))
+    for field in fields:
+        present = [(rank, movie[field]) for rank, movie in versions if field in movie]
+        rule = rules.get(field, FIELD_RULES.get(field, DEFAULT_RULE))
+        candidates = present if rule == 'newest' else [(rank, value) for rank, value in present
+                                                       if not is_empty(value)] or present
+        chosen_rank, chosen = candidates[-1]
+        merged[field] = chosen
+
+        distinct = {}
+        for rank, value in present:
+            if not is_empty(value):
+                distinct.setdefault(json.dumps(value, sort_keys=True, ensure_ascii=False), []).append(sources[rank])
+        if len(distinct) > 1:
+            conflicts.append({
+                'field': field,
+                'kept': sources[chosen_rank],
+                'values': [{'value': json.loads(value), 'sources': names} for value, names in distinct.items()]
+            })
+    return merged, conflicts
+
+
+def merge_catalogs(paths, output_file, report_file=None, by='order', rules=None):
+    """
+    Merge catalog copies into one, keyed by `index`, in a single pass
+    Each input is streamed once and its records are grouped by index, so a
+    copy in year order needs no sorting; the merged catalog is written in
+    index order. Each field is picked by its rule (see RULES), newer inputs
+    winning ties. Every field whose copies held different non-empty values
+    is written to `report_file` as one JSON line. Returns a Counter of what
+    happened.
+    """
+    paths = rank_inputs(paths, by)
+    sources = list(paths)
+    report_file = report_file or os.path.splitext(output_file)[0] + ".conflicts.jsonl"
+    grouped, without_index = group_by_index(paths)
+    stats = Counter()
+
+    with CatalogWriter(output_file) as writer, open(report_file, 'w', encoding='utf-8') as report:
+        for index in sorted(grouped):
+            versions = grouped[index]
+            movie, conflicts = merge_versions(versions, sources, rules)
+            writer.write(movie)
+            stats['movies'] += 1
+            stats[f"in_{len({rank for rank, _ in versions})}_copies"] += 1
+            for conflict in conflicts:
+                report.write(json.dumps(dict(index=index, title=movie.get('title'), **conflict),
+                                        ensure_ascii=False) + "\n")
+                stats[f"conflict:{conflict['field']}"] += 1
+        # Records without an index cannot be matched up, keep each one as it is
+        for movie in without_index:
+            writer.write(movie)
+        stats['without_index'] = len(without_index)
+
+    print(f"Merged {len(paths)} catalogs (oldest first: {', '.join(paths)})")
+    print(f"{stats['movies']} movies written to {output_file}"
+          + (f", {stats['without_index']} records without an index kept as they are" if stats['without_index'] else ""))
+    conflicts = {key.split(':', 1)[1]: count for key, count in stats.items() if key.startswith('conflict:')}
+    if conflicts:
+        print(f"Conflicting values ({report_file}): "
+              + ", ".join(f"{field} {count}" for field, count in sorted(conflicts.items(), key=lambda x: -x[1])))
+    else:
+        print("No conflicting values")
+    return stats
+
+
+def parse_rules(text):
+    """
+    Parse "cast=newest,plot=non_empty" into {field: rule}
+    """
+    rules = {}
+    for part in (text or '').split(','):
+        if not part.strip():
+            continue
+        field, _, rule = part.partition('=')
+        if rule.strip() not in RULES:
+            raise argparse.ArgumentTypeError(f"Unknown rule {rule.strip()!r}, expected one of {', '.join(RULES)}")
+        rules[field.strip()] = rule.strip()
+    return rules
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge diverging copies of the catalog into one")
+    parser.add_argument("catalogs", nargs="+", help="Catalog copies to merge")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--report", help="Conflict report, JSON lines (defaults to <output>.conflicts.jsonl)")
+    parser.add_argument("--order", choices=["order", "mtime"], default="order",
+                        help="Which copy is newest: the last one given, or by file modification time")
+    parser.add_argument("--rule", type=parse_rules, default={},
+                        help="Per-field rules, e.g. cast=newest (rules: non_empty, newest)")
+    args = parser.parse_args()
+    merge_catalogs(args.catalogs, args.output, args.report, args.order, args.rule)
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+
+from catalog_delta import record_hash
+from catalog_stream import atomic_write_bytes, iter_catalog
+from poster_assets import ASSET_DIR, PLACEHOLDERS_NAME
+
+SHARD_DIR = "movies"
+MANIFEST_NAME = "manifest.json"
+
+
+def shard_name(index):
+    return f"{index}.json"
+
+
+def load_shard_manifest(shard_dir):
+    try:
+        with open(os.path.join(shard_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'hashes': {}}
+
+
+def load_placeholders(out_dir):
+    """
+    {index: data URI} written by poster_assets, empty if it has not run
+    """
+    try:
+        with open(os.path.join(out_dir, ASSET_DIR, PLACEHOLDERS_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_movie_shards(catalog_file, out_dir=None):
+    """
+    Write one small JSON document per movie to <out_dir>/movies/<index>.json
+    A detail page then fetches a few hundred bytes instead of the whole
+    catalog. movies/manifest.json records each movie's content hash, so
+    only new and changed movies are rewritten and removed ones are deleted.
+    Each shard carries the movie's blur placeholder from assets/placeholders.json,
+    so a page showing a few movies doesn't download all of them.
+    """
+    out_dir = out_dir or os.path.dirname(os.path.abspath(catalog_file))
+    shard_dir = os.path.join(out_dir, SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+    old_hashes = load_shard_manifest(shard_dir).get('hashes', {})
+    placeholders = load_placeholders(out_dir)
+
+    hashes = {}
+    written = 0
+    for movie in iter_catalog(catalog_file):
+        index = movie.get('index')
+        if index is None:
+            continue
+        key = str(index)
+        if key in placeholders:
+            movie['placeholder'] = placeholders[key]
+        hashes[key] = record_hash(movie)
+        path = os.path.join(shard_dir, shard_name(index))
+        if old_hashes.get(key) == hashes[key] and os.path.exists(path):
+            continue
+        atomic_write_bytes(path, json.dumps(movie, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        written += 1
+
+    removed = 0
+    for key in old_hashes:
+        if key not in hashes:
+            try:
+                os.remove(os.path.join(shard_dir, shard_name(key)))
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+    manifest = {
+        'records': len(hashes),
+        'path': SHARD_DIR + "/{index}.json",
+        'hashes': hashes
+    }
+    atomic_write_bytes(os.path.join(shard_dir, MANIFEST_NAME),
+                       json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+
+    print(f"Movie shards: {len(hashes)} movies in {shard_dir}, {written} written, {removed} removed")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write one JSON document per movie for the detail pages")
+    parser.add_argument("catalog", nargs="?", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--out-dir", help="Directory to write the movies/ folder into (defaults to the catalog's directory)")
+    args = parser.parse_args()
+    write_movie_shards(args.catalog, args.out_dir)
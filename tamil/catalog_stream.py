@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+def file_mode_for(path):
+    """
+    Permissions for a replacement file: those of the file it replaces,
+    otherwise the umask default (mkstemp creates temp files private)
+    """
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_write_bytes(path, data):
+    """
+    Write to a temp file in the same directory and rename it over `path`
+    Readers see either the old file or the new one, never a torn write
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, file_mode_for(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def save_catalog(path, movies):
+    """
+    Atomic replacement for json.dump(movies, f, indent=2, ensure_ascii=False)
+    """
+    atomic_write_bytes(path, json.dumps(movies, indent=2, ensure_ascii=False).encode('utf-8'))
+
+
+def iter_catalog(path, chunk_size=CHUNK_SIZE):
+    """
+    Yield the records of a catalog JSON array one at a time
+    Only the current chunk and the record being decoded are held in memory
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            # Skip whitespace and separators between records
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+
+            if pos < len(buffer):
+                if not started:
+                    if buffer[pos] != '[':
+                        raise ValueError(f"{path} is not a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+                if buffer[pos] == ']':
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # The record continues in the next chunk
+                    if eof:
+                        raise
+                else:
+                    # A number at the very end of the buffer may still be incomplete
+                    if end < len(buffer) or eof:
+                        pos = end
+                        yield record
+                        continue
+
+            if eof:
+                if started:
+                    raise ValueError(f"Unexpected end of file in {path}")
+                return
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+class CatalogWriter:
+    """
+    Write a catalog JSON array one record at a time
+    The output is identical to json.dump(records, f, indent=2, ensure_ascii=False)
+    Records go to a temp file that only replaces `path` once the array is complete
+    """
+    def __init__(self, path, indent=2):
+        self.path = path
+        self.indent = indent
+        self.file = None
+        self.temp_path = None
+        self.count = 0
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(self.path) + '.',
+                                              suffix='.tmp')
+        self.file = os.fdopen(fd, 'w', encoding='utf-8')
+        return self
+
+    def write(self, record):
+        if self.indent is None:
+            text = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+            self.file.write(('[' if self.count == 0 else ',') + text)
+        else:
+            pad = ' ' * self.indent
+            text = json.dumps(record, indent=self.indent, ensure_ascii=False)
+            text = pad + text.replace('\n', '\n' + pad)
+            self.file.write(('[\n' if self.count == 0 else ',\n') + text)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Leave the previous output untouched
+            self.file.close()
+            os.remove(self.temp_path)
+            self.file = None
+            return False
+        if self.count == 0:
+            self.file.write('[]')
+        else:
+            self.file.write(']' if self.indent is None else '\n]')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        self.file = None
+        os.chmod(self.temp_path, file_mode_for(self.path))
+        os.replace(self.temp_path, self.path)
+        return False
+
+
+def write_catalog(path, records, indent=2):
+    """
+    Write every record from an iterable and return how many were written
+    """
+    with CatalogWriter(path, indent) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
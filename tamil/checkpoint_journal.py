@@ -0,0 +1,104 @@
+import json
+import os
+
+# Bytes read at a time when looking back for the last complete line
+TAIL_CHUNK = 4096
+
+
+def journal_path_for(output_file):
+    """
+    The journal lives next to the output file it is checkpointing
+    """
+    return output_file + ".journal.jsonl"
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal of completed lookups
+    Each line is written and fsynced as soon as a lookup finishes, so a
+    crash loses at most the lookup that was in flight
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def replay(self):
+        """
+        Return {movie index: details} for every lookup already journaled
+        A torn last line from a crash is ignored
+        """
+        completed = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    completed[entry['index']] = entry['details']
+        except FileNotFoundError:
+            pass
+        return completed
+
+    def drop_torn_tail(self):
+        """
+        Cut off a last line left unfinished by a crash, so the next record
+        starts on a line of its own instead of merging with it
+        """
+        try:
+            with open(self.path, 'rb+') as f:
+                size = f.seek(0, os.SEEK_END)
+                end = size
+                while end > 0:
+                    start = max(0, end - TAIL_CHUNK)
+                    f.seek(start)
+                    newline = f.read(end - start).rfind(b"\n")
+                    if newline >= 0:
+                        end = start + newline + 1
+                        break
+                    end = start
+                if end < size:
+                    f.truncate(end)
+        except FileNotFoundError:
+            pass
+
+    def record(self, index, details):
+        """
+        Append one completed lookup and make sure it reaches the disk
+        """
+        if self.file is None:
+            self.drop_torn_tail()
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(json.dumps({'index': index, 'details': details}, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def clear(self):
+        """
+        Start a fresh run
+        """
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def open_journal(output_file, resume=False):
+    """
+    Open the journal for a run and return (journal, completed)
+    Without resume any previous journal is discarded
+    """
+    journal = CheckpointJournal(journal_path_for(output_file))
+    if not resume:
+        journal.clear()
+        return journal, {}
+    completed = journal.replay()
+    print(f"Resuming: {len(completed)} lookups already journaled in {journal.path}")
+    return journal, completed
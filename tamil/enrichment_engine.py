@@ -0,0 +1,521 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog_db import CatalogDB
+from catalog_stream import CatalogWriter, iter_catalog, save_catalog
+from checkpoint_journal import open_journal
+from metrics import export_run_metrics
+from omdb_cache import get_default_cache, lookup_key
+from omdb_client import ERROR, HIT, THROTTLED
+from omdb_fields import project
+from poster_stage import PosterVerdicts, resolve_posters
+from scheduler import PRESETS, needs_lookup, parse_weights, schedule_preset
+from update_movies_with_details import lookup_movie_details
+
+# What a movie OMDB could not resolve gets
+MISS_DETAILS = {'cast': [], 'director': '', 'poster': ''}
+
+# Records whose posters are checked together in streaming mode
+POSTER_BATCH = 256
+
+
+class RateLimiter:
+    """
+    Global rate limit shared by every worker
+    Spaces request starts so that no more than `rate` begin per second
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def answer_from_cache(movie, lookup_details):
+    """
+    Fill the empty fields of a movie from the response cache, or from the
+    payload stored when OMDB last resolved it, if either holds its answer
+    Returns the fields filled, None when neither does or the answer fills
+    nothing. Stored answers cost no request, so they take neither budget
+    nor rate limit.
+    """
+    title, year = movie.get('title', ''), movie.get('year', '')
+    details, result = lookup_details(title, year, cache_only=True)
+    if result is None:
+        payload = get_default_cache().get_payload(title, year)
+        if payload is None:
+            return None
+        details = project(payload)
+    elif result.status != HIT:
+        details = dict(MISS_DETAILS)
+    filled = {field: value for field, value in details.items()
+              if not movie.get(field) and (value or field not in movie)}
+    if not filled:
+        return None
+    movie.update(filled)
+    return filled
+
+
+def network_outcome(details, result):
+    """
+    The details to apply for a network lookup, None if it answered nothing
+    (an error is retried by a later run, so it is never journaled)
+    """
+    if result.status in (THROTTLED, ERROR):
+        return None
+    return details if result.status == HIT else dict(MISS_DETAILS)
+
+
+async def enrich_movies(movies, lookup_details, max_requests=1000, concurrency=10, requests_per_second=5,
+                        journal=None, skip_indexes=()):
+    """
+    Look up details for the movies that still need them, keeping up to
+    `concurrency` lookups in flight behind one global rate limit.
+    Returns (results, requests_made, throttled) where results maps the
+    position of each movie in `movies` to the details that were found.
+    Only lookups that went to the network count as requests.
+    Each completed lookup is recorded in `journal` as soon as it finishes,
+    movies whose index is in `skip_indexes` are not looked up again.
+    """
+    queue = asyncio.Queue()
+    for position, movie in enumerate(movies):
+        if needs_lookup(movie) and movie.get('index') not in skip_indexes:
+            queue.put_nowait(position)
+
+    limiter = RateLimiter(requests_per_second)
+    throttled = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    results = {}
+    state = {'requests_made': 0}
+
+    async def worker(executor):
+        while not throttled.is_set() and state['requests_made'] < max_requests:
+            try:
+                position = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            # Reserve the request before waiting so workers never overshoot the budget
+            state['requests_made'] += 1
+            await limiter.wait()
+            if throttled.is_set():
+                state['requests_made'] -= 1
+                return
+
+            movie = movies[position]
+            details, result = await loop.run_in_executor(
+                executor, lookup_details, movie.get('title', ''), movie.get('year', ''))
+            if result.from_cache:
+                # Answered without a request after all, give the reservation back
+                state['requests_made'] -= 1
+            if result.status == THROTTLED:
+                # The provider is refusing requests, let in-flight lookups finish and stop
+                throttled.set()
+                return
+            details = network_outcome(details, result)
+            if details is None:
+                continue
+            results[position] = details
+            if journal is not None:
+                journal.record(movie.get('index'), details)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*(worker(executor) for _ in range(concurrency)))
+
+    return results, state['requests_made'], throttled.is_set()
+
+
+# Marks a lookup that was never sent because the provider started throttling
+SKIPPED = object()
+
+
+async def enrich_stream(records, lookup_details, stats, max_requests=1000, concurrency=10,
+                        requests_per_second=5, journal=None, completed=None, selected=None, enriched=None):
+    """
+    Streaming version of enrich_movies
+    Consumes `records` lazily and yields them back in the same order with
+    their details filled in. At most `concurrency` lookups are in flight and
+    only a few times that many records are held in memory at once.
+    `stats` receives requests_made (network lookups only), from_cache and
+    throttled as the run goes, `completed` holds details replayed from the
+    journal of an earlier run, `selected` (if given) limits network lookups
+    to the scheduled movie indexes; any record the response cache can
+    answer is filled for free. `enriched` (if given) collects the indexes
+    of the records that got details in this run.
+    """
+    completed = completed or {}
+    enriched = enriched if enriched is not None else set()
+    limiter = RateLimiter(requests_per_second)
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    window = deque()
+    window_size = concurrency * 4
+    stats['requests_made'] = 0
+    stats['from_cache'] = 0
+    stats['throttled'] = False
+
+    async def lookup(executor, movie):
+        async with semaphore:
+            if stats['throttled']:
+                stats['requests_made'] -= 1
+                return SKIPPED
+            await limiter.wait()
+            return await loop.run_in_executor(
+                executor, lookup_details, movie.get('title', ''), movie.get('year', ''))
+
+    async def finish(movie, task):
+        if task is not None:
+            outcome = await task
+            if outcome is not SKIPPED:
+                details, result = outcome
+                if result.from_cache:
+                    stats['requests_made'] -= 1
+                if result.status == THROTTLED:
+                    # The provider is refusing requests, stop starting new lookups
+                    stats['throttled'] = True
+                details = network_outcome(details, result)
+                if details is not None:
+                    movie.update(details)
+                    enriched.add(movie.get('index'))
+                    if journal is not None:
+                        journal.record(movie.get('index'), details)
+        elif not movie.get('title'):
+            movie['cast'] = []
+            movie['director'] = ''
+            movie['poster'] = ''
+        return movie
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for movie in records:
+            task = None
+            if movie.get('index') in completed:
+                movie.update(completed[movie['index']])
+                enriched.add(movie.get('index'))
+            elif needs_lookup(movie) and answer_from_cache(movie, lookup_details) is not None:
+                stats['from_cache'] += 1
+                enriched.add(movie.get('index'))
+            elif (needs_lookup(movie) and (selected is None or movie.get('index') in selected)
+                  and not stats['throttled'] and stats['requests_made'] < max_requests):
+                stats['requests_made'] += 1
+                task = asyncio.ensure_future(lookup(executor, movie))
+            window.append((movie, task))
+
+            # Hand back finished records in order, wait on the oldest one when the window is full
+            while window and (len(window) > window_size or window[0][1] is None or window[0][1].done()):
+                yield await finish(*window.popleft())
+
+        while window:
+            yield await finish(*window.popleft())
+
+
+def lookup_filter(completed, lookup_details=None):
+    """
+    Movies that still need a lookup, minus those journaled by an interrupted
+    run, titles OMDB recently could not resolve and movies whose payload is
+    stored (OMDB already gave all it has for them, the fields it left empty
+    stay empty); with `lookup_details`, also minus those the response cache
+    can answer, so the whole request budget goes to movies that need the network
+    """
+    cache = get_default_cache()
+    skipped = cache.known_miss_keys() | cache.payload_keys()
+
+    def eligible(movie):
+        if not (needs_lookup(movie) and movie.get('index') not in completed
+                and lookup_key(movie.get('title'), movie.get('year')) not in skipped):
+            return False
+        return (lookup_details is None
+                or lookup_details(movie.get('title', ''), movie.get('year', ''), cache_only=True)[1] is None)
+    return eligible
+
+
+def report_posters(posters):
+    print(f"Posters: {posters['hires']} upscaled, {posters['original']} kept at original size, "
+          f"{posters['missing']} missing")
+
+
+def update_movies_concurrently(input_file, output_file, lookup_details=lookup_movie_details,
+                               max_requests=1000, concurrency=10, requests_per_second=5, resume=False,
+                               preset='newest', weights=None, check_posters=True):
+    """
+    Concurrent version of update_movies_with_details
+    The request budget goes to the movies the scheduler ranks highest
+    (newest first by default), results are written back in original index order
+    With check_posters, the posters of the movies enriched in this run are
+    upscaled where the larger image exists (see poster_stage)
+    """
+    # Load the existing movies data
+    try:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            movies = json.load(f)
+    except FileNotFoundError:
+        print(f"Error: File {input_file} not found.")
+        return
+    except json.JSONDecodeError:
+        print(f"Error: Invalid JSON in file {input_file}.")
+        return
+
+    # Replay lookups journaled by an interrupted run
+    journal, completed = open_journal(output_file, resume)
+    # Movies that got details in this run, replayed ones included
+    enriched = []
+    for movie in movies:
+        if movie.get('index') in completed:
+            movie.update(completed[movie['index']])
+            enriched.append(movie)
+
+    # Whatever the response cache already answers is free, the budget is for the rest
+    from_cache = 0
+    for movie in movies:
+        if (needs_lookup(movie) and movie.get('index') not in completed
+                and answer_from_cache(movie, lookup_details) is not None):
+            from_cache += 1
+            enriched.append(movie)
+
+    # Spend the request budget on the movies that matter most
+    plan = schedule_preset(movies, max_requests, preset, weights,
+                           eligible=lookup_filter(completed, lookup_details))
+
+    # One request per distinct title and year, the answer is fanned out to every record sharing it
+    groups = {}
+    for movie in plan:
+        groups.setdefault(lookup_key(movie.get('title'), movie.get('year')), []).append(movie)
+    lookups = [group[0] for group in groups.values()]
+
+    print(f"Loaded {len(movies)} movies from {input_file}, {from_cache} answered from the response cache, "
+          f"{len(plan)} scheduled for lookup ({len(lookups)} distinct requests)")
+    print(f"Will process up to {max_requests} movies with {concurrency} lookups in flight "
+          f"at {requests_per_second} requests/second")
+
+    started = time.monotonic()
+    results, requests_made, throttled = asyncio.run(
+        enrich_movies(lookups, lookup_details, max_requests, concurrency, requests_per_second,
+                      journal=journal, skip_indexes=completed))
+    journal.close()
+    elapsed = time.monotonic() - started
+
+    if throttled:
+        print("API limit reached. Saving progress and stopping.")
+
+    for position, details in results.items():
+        lookup = lookups[position]
+        for movie in groups[lookup_key(lookup.get('title'), lookup.get('year'))]:
+            movie.update(details)
+            enriched.append(movie)
+    for movie in movies:
+        if not movie.get('title'):
+            movie['cast'] = []
+            movie['director'] = ''
+            movie['poster'] = ''
+
+    if check_posters:
+        report_posters(resolve_posters([movie for movie in enriched if movie.get('poster')]))
+
+    # Write back in index order
+    movies.sort(key=lambda x: x.get('index', 0))
+
+    # Save the updated data
+    try:
+        save_catalog(output_file, movies)
+        print(f"\nUpdated movies data saved to {output_file}")
+        print(f"Made {requests_made} API requests in {elapsed:.1f}s")
+        # Everything is in the output file now, the journal is no longer needed
+        journal.clear()
+    except Exception as e:
+        print(f"Error saving file: {e}")
+        print(f"Completed lookups are kept in {journal.path}, rerun with --resume to continue")
+
+
+def update_movies_streaming(input_file, output_file, lookup_details=lookup_movie_details,
+                            max_requests=1000, concurrency=10, requests_per_second=5, resume=False,
+                            preset='newest', weights=None, check_posters=True):
+    """
+    Streaming version of update_movies_concurrently
+    Records are read, enriched and written one at a time in file order, so
+    memory stays flat no matter how large the catalog grows. Scheduling
+    takes two extra streaming passes and only keeps the chosen indexes.
+    Posters are checked POSTER_BATCH records at a time before they are written.
+    """
+    if not os.path.exists(input_file):
+        print(f"Error: File {input_file} not found.")
+        return
+
+    journal, completed = open_journal(output_file, resume)
+    stats = {}
+
+    try:
+        max_index = max((movie.get('index') or 0 for movie in iter_catalog(input_file)), default=0)
+        selected = {movie.get('index') for movie in schedule_preset(
+            iter_catalog(input_file), max_requests, preset, weights, max_index=max_index,
+            eligible=lookup_filter(completed, lookup_details))}
+    except ValueError as e:
+        print(f"Error: Invalid JSON in file {input_file}: {e}")
+        return
+
+    enriched = set()
+    posters = Counter()
+    verdicts = PosterVerdicts() if check_posters else None
+
+    async def run():
+        batch = []
+
+        async def flush(writer):
+            if verdicts is not None:
+                new = [movie for movie in batch if movie.get('index') in enriched and movie.get('poster')]
+                posters.update(await asyncio.get_running_loop().run_in_executor(
+                    None, resolve_posters, new, 16, verdicts))
+                enriched.difference_update(movie.get('index') for movie in batch)
+            for movie in batch:
+                writer.write(movie)
+            batch.clear()
+
+        with CatalogWriter(output_file) as writer:
+            async for movie in enrich_stream(iter_catalog(input_file), lookup_details, stats, max_requests,
+                                             concurrency, requests_per_second, journal, completed,
+                                             selected, enriched):
+                batch.append(movie)
+                if len(batch) >= POSTER_BATCH:
+                    await flush(writer)
+            await flush(writer)
+        return writer.count
+
+    print(f"Streaming movies from {input_file}, {len(selected)} scheduled for lookup")
+    print(f"Will process up to {max_requests} movies with {concurrency} lookups in flight "
+          f"at {requests_per_second} requests/second")
+
+    started = time.monotonic()
+    try:
+        count = asyncio.run(run())
+    except ValueError as e:
+        print(f"Error: Invalid JSON in file {input_file}: {e}")
+        return
+    finally:
+        journal.close()
+        if verdicts is not None:
+            verdicts.close()
+    elapsed = time.monotonic() - started
+
+    if stats['throttled']:
+        print("API limit reached. Saving progress and stopping.")
+    if check_posters:
+        report_posters(posters)
+
+    journal.clear()
+    print(f"\nUpdated {count} movies saved to {output_file}, {stats['from_cache']} answered from the response cache")
+    print(f"Made {stats['requests_made']} API requests in {elapsed:.1f}s")
+
+
+class DatabaseWriter:
+    """
+    Takes the place of the checkpoint journal when the catalog is a database:
+    each finished lookup is committed at once to every row sharing its title
+    and year, so an interrupted run loses nothing and needs no --resume
+    """
+    def __init__(self, db, groups):
+        self.db = db
+        self.groups = groups
+        self.by_index = {movie.get('index'): key for key, group in groups.items() for movie in group}
+        self.updated = 0
+        # The rows written so far, with their new details
+        self.movies = []
+
+    def record(self, index, details):
+        group = self.groups[self.by_index[index]]
+        self.db.update_many([(movie['index'], details) for movie in group])
+        for movie in group:
+            movie.update(details)
+        self.movies.extend(group)
+        self.updated += len(group)
+
+
+def update_movies_in_db(db_file, lookup_details=lookup_movie_details, max_requests=1000, concurrency=10,
+                        requests_per_second=5, preset='newest', weights=None, check_posters=True):
+    """
+    update_movies_concurrently against a catalog_db database
+    Only the rows that got new details are written, one transaction per
+    lookup; export the JSON files with `catalog_db.py export` afterwards.
+    With check_posters, the new posters are checked once the lookups are
+    done and written back in one more transaction.
+    """
+    with CatalogDB(db_file) as db:
+        movies = db.movies()
+        # Whatever the response cache already answers is free, the budget is for the rest
+        cached = {}
+        for movie in movies:
+            if needs_lookup(movie):
+                details = answer_from_cache(movie, lookup_details)
+                if details is not None:
+                    cached[movie['index']] = details
+        db.update_many(list(cached.items()))
+        plan = schedule_preset(movies, max_requests, preset, weights, eligible=lookup_filter({}, lookup_details))
+
+        groups = {}
+        for movie in plan:
+            groups.setdefault(lookup_key(movie.get('title'), movie.get('year')), []).append(movie)
+        lookups = [group[0] for group in groups.values()]
+
+        print(f"Loaded {len(movies)} movies from {db_file}, {len(cached)} answered from the response cache, "
+              f"{len(plan)} scheduled for lookup ({len(lookups)} distinct requests)")
+        print(f"Will process up to {max_requests} movies with {concurrency} lookups in flight "
+              f"at {requests_per_second} requests/second")
+
+        started = time.monotonic()
+        writer = DatabaseWriter(db, groups)
+        _, requests_made, throttled = asyncio.run(
+            enrich_movies(lookups, lookup_details, max_requests, concurrency, requests_per_second, journal=writer))
+        elapsed = time.monotonic() - started
+
+        if check_posters:
+            new = [movie for movie in movies if movie['index'] in cached] + writer.movies
+            new = [movie for movie in new if movie.get('poster')]
+            report_posters(resolve_posters(new))
+            db.update_many([(movie['index'], {'poster': movie['poster']}) for movie in new])
+
+    if throttled:
+        print("API limit reached. Stopping, every finished lookup is already saved.")
+    print(f"\nUpdated {writer.updated + len(cached)} movies in {db_file}")
+    print(f"Made {requests_made} API requests in {elapsed:.1f}s")
+
+
+# Run the update
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch movie details with many lookups in flight")
+    parser.add_argument("--input", default="imdb_tamil_movies_full.json")
+    parser.add_argument("--output", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--max-requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=5, help="Requests per second across all workers")
+    parser.add_argument("--stream", action="store_true",
+                        help="Process the catalog record by record in file order with flat memory use")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="newest",
+                        help="Which movies get the request budget first")
+    parser.add_argument("--policy", type=parse_weights,
+                        help="Custom policy weights, e.g. recency=1,missing_fields=0.5,rating=0.5")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its journal")
+    parser.add_argument("--db", help="Update this catalog_db database row by row instead of --input/--output")
+    parser.add_argument("--no-poster-check", action="store_true",
+                        help="Keep posters as OMDB returns them instead of checking for larger ones")
+    args = parser.parse_args()
+
+    print("Starting Tamil Movies Update (concurrent)...")
+    print("=" * 50)
+    if args.db:
+        update_movies_in_db(args.db, max_requests=args.max_requests, concurrency=args.concurrency,
+                            requests_per_second=args.rate, preset=args.preset, weights=args.policy,
+                            check_posters=not args.no_poster_check)
+    else:
+        update = update_movies_streaming if args.stream else update_movies_concurrently
+        update(args.input, args.output, max_requests=args.max_requests,
+               concurrency=args.concurrency, requests_per_second=args.rate, resume=args.resume,
+               preset=args.preset, weights=args.policy, check_posters=not args.no_poster_check)
+    export_run_metrics('enrichment_engine')
@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from metrics import get_metrics
+
+DEFAULT_KEYS_FILE = "omdb_keys.json"
+DEFAULT_USAGE_FILE = "omdb_key_usage.sqlite3"
+DEFAULT_DAILY_LIMIT = 1000
+
+# Placeholder used in the sample scripts, never a real key
+PLACEHOLDER_KEY = "YOUR_API_KEY"
+
+
+def today():
+    """
+    OMDB quotas reset daily, count usage per UTC day
+    """
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+def mask_key(api_key):
+    return api_key[:4] + '...' if api_key else ''
+
+
+def load_key_config(path=DEFAULT_KEYS_FILE):
+    """
+    Read {api_key: daily_limit} from the OMDB_API_KEYS environment variable
+    (comma separated) and from omdb_keys.json, which looks like
+    {"daily_limit": 1000, "keys": ["abcd1234", {"key": "efgh5678", "daily_limit": 100000}]}
+    """
+    keys = {}
+    daily_limit = DEFAULT_DAILY_LIMIT
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        daily_limit = config.get('daily_limit', DEFAULT_DAILY_LIMIT)
+        for entry in config.get('keys', []):
+            if isinstance(entry, dict):
+                keys[entry['key']] = entry.get('daily_limit', daily_limit)
+            else:
+                keys[entry] = daily_limit
+    except FileNotFoundError:
+        pass
+    except (json.JSONDecodeError, KeyError) as e:
+        print(f"Error: Invalid key config in {path}: {e}")
+
+    for api_key in os.environ.get('OMDB_API_KEYS', '').split(','):
+        api_key = api_key.strip()
+        if api_key and api_key not in keys:
+            keys[api_key] = daily_limit
+    return keys
+
+
+class KeyPool:
+    """
+    Several OMDB API keys with their daily quota tracked on disk
+    Every request is routed to the key with the most headroom left today.
+    A key that is refused (401: invalid or out of quota) is retired for
+    the day, a key that gets a 429 cools down briefly while the others
+    carry on.
+    """
+    def __init__(self, keys, path=DEFAULT_USAGE_FILE):
+        # keys is {api_key: daily_limit}
+        self.limits = {k: v for k, v in keys.items() if k and k != PLACEHOLDER_KEY}
+        self.cooling = {}
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS key_usage (
+                day TEXT NOT NULL,
+                api_key TEXT NOT NULL,
+                used INTEGER NOT NULL DEFAULT 0,
+                exhausted INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, api_key)
+            )
+        """)
+        self.conn.commit()
+        for api_key, left in self.remaining().items():
+            get_metrics().set('omdb_key_quota_remaining', left, key=mask_key(api_key))
+
+    def usage(self):
+        """
+        Return {api_key: (used, exhausted)} for today
+        """
+        rows = self.conn.execute(
+            "SELECT api_key, used, exhausted FROM key_usage WHERE day = ?", (today(),)).fetchall()
+        return {row[0]: (row[1], bool(row[2])) for row in rows}
+
+    def remaining(self):
+        """
+        Return {api_key: requests left today}
+        """
+        with self.lock:
+            usage = self.usage()
+        left = {}
+        for api_key, limit in self.limits.items():
+            used, exhausted = usage.get(api_key, (0, False))
+            left[api_key] = 0 if exhausted else max(limit - used, 0)
+        return left
+
+    def acquire(self):
+        """
+        Reserve one request on the key with the most headroom
+        Waits if every key with quota left is cooling down after a 429,
+        returns None once every key is out of quota for today
+        """
+        while True:
+            with self.lock:
+                usage = self.usage()
+                now = time.monotonic()
+                best = None
+                soonest = None
+                for api_key, limit in self.limits.items():
+                    used, exhausted = usage.get(api_key, (0, False))
+                    if exhausted or used >= limit:
+                        continue
+                    ready_at = self.cooling.get(api_key, 0)
+                    if ready_at > now:
+                        soonest = ready_at if soonest is None else min(soonest, ready_at)
+                        continue
+                    if best is None or limit - used > best[1]:
+                        best = (api_key, limit - used)
+                if best is not None:
+                    self.conn.execute(
+                        "INSERT INTO key_usage (day, api_key, used) VALUES (?, ?, 1) "
+                        "ON CONFLICT (day, api_key) DO UPDATE SET used = used + 1",
+                        (today(), best[0]))
+                    self.conn.commit()
+                    get_metrics().set('omdb_key_quota_remaining', best[1] - 1, key=mask_key(best[0]))
+                    return best[0]
+            if soonest is None:
+                return None
+            time.sleep(soonest - now)
+
+    def cool_down(self, api_key, seconds):
+        """
+        Keep a throttled key out of rotation for a few seconds
+        """
+        with self.lock:
+            self.cooling[api_key] = time.monotonic() + seconds
+
+    def mark_exhausted(self, api_key):
+        """
+        Retire a key until tomorrow
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO key_usage (day, api_key, exhausted) VALUES (?, ?, 1) "
+                "ON CONFLICT (day, api_key) DO UPDATE SET exhausted = 1",
+                (today(), api_key))
+            self.conn.commit()
+        get_metrics().set('omdb_key_quota_remaining', 0, key=mask_key(api_key))
+        print(f"API key {mask_key(api_key)} is out of quota for today, switching to the next key")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def load_key_pool(fallback_key=None, config_path=DEFAULT_KEYS_FILE, usage_path=DEFAULT_USAGE_FILE):
+    """
+    Build the pool from the key config, with the calling script's own key added
+    """
+    keys = load_key_config(config_path)
+    if fallback_key and fallback_key not in keys:
+        keys[fallback_key] = DEFAULT_DAILY_LIMIT
+    return KeyPool(keys, usage_path)
@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from catalog_stream import atomic_write_bytes
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_HELP = {
+    'omdb_lookups_total': ('counter', "Movie lookups by where the answer came from"),
+    'omdb_requests_total': ('counter', "HTTP requests sent to OMDB by outcome"),
+    'omdb_lookup_seconds': ('histogram', "Time to answer a lookup from the network, retries included"),
+    'omdb_key_quota_remaining': ('gauge', "Requests left today per API key"),
+    'omdb_cache_hit_ratio': ('gauge', "Share of lookups answered by the response cache"),
+    'enrichment_run_seconds': ('gauge', "Duration of the last run"),
+    'enrichment_records_per_second': ('gauge', "Lookups per second over the last run"),
+    'enrichment_last_run_timestamp_seconds': ('gauge', "When the last run finished"),
+}
+
+
+def label_text(labels):
+    return ','.join(f'{k}="{v}"' for k, v in labels)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction):
+        """
+        Upper bound of the bucket holding the given quantile
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """
+    Counters, gauges and histograms collected during one run
+    Series are identified by name plus labels, e.g.
+    count('omdb_requests_total', outcome='hit')
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def total(self, name, **labels):
+        """
+        Sum of a counter over every series matching `labels`
+        """
+        wanted = set(labels.items())
+        with self.lock:
+            return sum(value for (series, series_labels), value in self.counters.items()
+                       if series == name and wanted <= set(series_labels))
+
+    def gauge_total(self, name):
+        """
+        Sum of a gauge over its series, None if it was never set
+        """
+        with self.lock:
+            values = [value for (series, _), value in self.gauges.items() if series == name]
+        return sum(values) if values else None
+
+    def finish(self):
+        """
+        Compute the run-level gauges
+        """
+        seconds = time.time() - self.started
+        lookups = self.total('omdb_lookups_total')
+        cached = self.total('omdb_lookups_total', source='cache')
+        network = self.total('omdb_lookups_total', source='network')
+        self.set('enrichment_run_seconds', round(seconds, 3))
+        self.set('enrichment_records_per_second', round(lookups / seconds, 3) if seconds else 0.0)
+        self.set('omdb_cache_hit_ratio', round(cached / (cached + network), 4) if cached + network else 0.0)
+        self.set('enrichment_last_run_timestamp_seconds', int(time.time()))
+
+    def report(self, job):
+        """
+        Run report as a JSON-ready dict
+        """
+        def grouped(series):
+            result = {}
+            for (name, labels), value in sorted(series.items()):
+                result.setdefault(name, {})[label_text(labels) or 'total'] = value
+            return result
+
+        with self.lock:
+            histograms = {}
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                histograms.setdefault(name, {})[label_text(labels) or 'total'] = {
+                    'count': histogram.count,
+                    'sum': round(histogram.sum, 6),
+                    'p50': histogram.quantile(0.50),
+                    'p90': histogram.quantile(0.90),
+                    'p99': histogram.quantile(0.99)
+                }
+            return {
+                'job': job,
+                'started': datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+                'finished': datetime.now(timezone.utc).isoformat(),
+                'counters': grouped(self.counters),
+                'gauges': grouped(self.gauges),
+                'histograms': histograms
+            }
+
+    def prometheus(self, job):
+        """
+        The metrics in Prometheus text format, every series labelled with `job`
+        """
+        families = {}
+        with self.lock:
+            for (name, labels), value in self.counters.items():
+                families.setdefault(name, []).append((labels, value))
+            for (name, labels), value in self.gauges.items():
+                families.setdefault(name, []).append((labels, value))
+            for (name, labels), histogram in self.histograms.items():
+                families.setdefault(name, []).append((labels, histogram))
+
+            lines = []
+            for name in sorted(families):
+                kind, help_text = METRIC_HELP.get(name, ('untyped', name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(families[name], key=lambda item: item[0]):
+                    labels = (('job', job),) + labels
+                    if isinstance(value, Histogram):
+                        cumulative = 0
+                        for bound, count in zip(value.buckets + ('+Inf',), value.counts):
+                            cumulative += count
+                            lines.append(f'{name}_bucket{{{label_text(labels + (("le", bound),))}}} {cumulative}')
+                        lines.append(f"{name}_sum{{{label_text(labels)}}} {value.sum}")
+                        lines.append(f"{name}_count{{{label_text(labels)}}} {value.count}")
+                    else:
+                        lines.append(f"{name}{{{label_text(labels)}}} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Return the metrics of this process, shared by the client and the updaters
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
+
+
+def export_run_metrics(job, report_dir='.', textfile_dir=None):
+    """
+    Write <job>.report.json and the Prometheus textfile <job>.prom
+    The textfile goes to `textfile_dir`, the METRICS_TEXTFILE_DIR environment
+    variable (point it at the node exporter's textfile collector directory)
+    or next to the report. Both are replaced atomically.
+    """
+    metrics = get_metrics()
+    metrics.finish()
+    textfile_dir = textfile_dir or os.environ.get('METRICS_TEXTFILE_DIR') or report_dir
+
+    report_file = os.path.join(report_dir, f"{job}.report.json")
+    atomic_write_bytes(report_file, json.dumps(metrics.report(job), indent=2).encode('utf-8'))
+    textfile = os.path.join(textfile_dir, f"{job}.prom")
+    atomic_write_bytes(textfile, metrics.prometheus(job).encode('utf-8'))
+
+    gauges = {name: value for (name, labels), value in metrics.gauges.items() if not labels}
+    print(f"Run metrics written to {report_file} and {textfile}")
+    print(f"  {metrics.total('omdb_lookups_total')} lookups, "
+          f"{gauges['enrichment_records_per_second']} per second, "
+          f"cache hit ratio {gauges['omdb_cache_hit_ratio']:.0%}")
+    return report_file, textfile
@@ -5,9 +5,25 @@ const movieId = urlParams.get('id');
 // Load favorite movies from localStorage
 let favoriteMovies = JSON.parse(localStorage.getItem('favoriteMovies')) || [];
 
+// Fetch just this movie from its shard written by catalog_shards.py,
+// otherwise the whole file with cast information
+function fetchMoviesWithCast() {
+    if (!movieId) {
+        return Promise.resolve([]);
+    }
+    return fetch(`movies/${movieId}.json`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('No shard for movie ' + movieId);
+            }
+            return response.json();
+        })
+        .then(movie => [movie])
+        .catch(() => fetch('imdb_tamil_movies_with_cast.json').then(response => response.json()));
+}
+
 // Fetch movie data - first try the file with cast information, fallback to original
-fetch('imdb_tamil_movies_with_cast.json')
-    .then(response => response.json())
+fetchMoviesWithCast()
     .then(movies => {
         if (movieId) {
             const movie = movies.find(m => m.index == movieId);
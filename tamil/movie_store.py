@@ -0,0 +1,106 @@
+import json
+from collections import defaultdict
+
+from catalog_columnar import ColumnarCatalog
+from catalog_stream import save_catalog
+from omdb_cache import normalize_title
+
+
+class MovieStore:
+    """
+    The movie catalog loaded once, with hash indexes by index, year and
+    normalized title
+    Records are the catalog dicts themselves, so updating a record through
+    the store or directly is the same thing
+    """
+    def __init__(self, movies):
+        # Keep the catalog in index order, sorted once here instead of after every update
+        self.records = sorted(movies, key=lambda x: x.get('index', 0))
+        self.by_index = {}
+        self.by_year = defaultdict(dict)
+        self.by_title = defaultdict(dict)
+        for movie in self.records:
+            self.add_to_indexes(movie)
+
+    @classmethod
+    def load(cls, path):
+        # A .tmcat file written by catalog_columnar loads without parsing any JSON
+        if path.endswith('.tmcat'):
+            with ColumnarCatalog(path) as catalog:
+                return cls(list(catalog))
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def add_to_indexes(self, movie):
+        index = movie.get('index')
+        self.by_index[index] = movie
+        self.by_year[movie.get('year') or ''][index] = movie
+        self.by_title[normalize_title(movie.get('title'))][index] = movie
+
+    def remove_from_indexes(self, movie):
+        index = movie.get('index')
+        self.by_year[movie.get('year') or ''].pop(index, None)
+        self.by_title[normalize_title(movie.get('title'))].pop(index, None)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, index):
+        return index in self.by_index
+
+    def get(self, index):
+        return self.by_index.get(index)
+
+    def with_year(self, year):
+        """
+        Movies released in `year`, in index order
+        """
+        return sorted(self.by_year.get(str(year), {}).values(), key=lambda x: x.get('index', 0))
+
+    def from_year(self, min_year):
+        """
+        Movies released in `min_year` or later, in index order
+        """
+        selected = []
+        for year, movies in self.by_year.items():
+            if year.isdigit() and int(year) >= min_year:
+                selected.extend(movies.values())
+        selected.sort(key=lambda x: x.get('index', 0))
+        return selected
+
+    def with_title(self, title):
+        """
+        Movies whose title normalizes to the same key as `title`
+        """
+        return sorted(self.by_title.get(normalize_title(title), {}).values(), key=lambda x: x.get('index', 0))
+
+    def partition(self, selected):
+        """
+        Split the catalog into (selected, rest) given a list of selected movies
+        Membership is checked by index, not by comparing dicts
+        """
+        selected_indexes = {movie.get('index') for movie in selected}
+        rest = [movie for movie in self.records if movie.get('index') not in selected_indexes]
+        return selected, rest
+
+    def update(self, index, fields):
+        """
+        Update one record in place, keeping the year and title indexes current
+        """
+        movie = self.by_index[index]
+        reindex = 'year' in fields or 'title' in fields
+        if reindex:
+            self.remove_from_indexes(movie)
+        movie.update(fields)
+        if reindex:
+            self.add_to_indexes(movie)
+        return movie
+
+    def movies(self):
+        """
+        Every record in stable index order
+        """
+        return self.records
+
+    def save(self, path):
+        save_catalog(path, self.records)
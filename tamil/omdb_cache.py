@@ -0,0 +1,242 @@
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_FILE = "omdb_cache.sqlite3"
+
+# Parameters that do not change the answer and must not split the cache
+IGNORED_PARAMS = {'apikey'}
+
+DAY = 24 * 60 * 60
+
+
+def normalize_title(title):
+    """
+    Lowercase and collapse whitespace so trivial spelling differences share a key
+    """
+    return ' '.join((title or '').lower().split())
+
+
+def cache_key(params):
+    """
+    Build the cache key from the query parameters of an OMDB request
+    Title and year are normalized, the remaining parameters are sorted
+    """
+    title = normalize_title(params.get('t', ''))
+    year = str(params.get('y', '') or '').strip()
+    rest = sorted((k, str(v)) for k, v in params.items()
+                  if k not in IGNORED_PARAMS and k not in ('t', 'y'))
+    return '|'.join([title, year, '&'.join(f"{k}={v}" for k, v in rest)])
+
+
+def lookup_key(title, year=None):
+    """
+    Identify a movie by normalized title and year, whatever the other query parameters
+    Used to track known misses and to send one request per distinct movie
+    """
+    return f"{normalize_title(title)}|{str(year or '').strip()}"
+
+
+class OmdbCache:
+    """
+    SQLite-backed cache of OMDB responses shared by every updater script
+    Entries expire after `ttl_days`, the least recently used entries are
+    evicted once the cache holds more than `max_entries` responses.
+    Titles OMDB cannot resolve are kept in a separate table with their
+    attempt count; they are re-checked after miss_base_days, then twice as
+    long after every further miss, up to miss_max_days.
+    The last successful response for each movie is also kept in a payloads
+    table that never expires, so catalog fields can be projected from it
+    again later without asking OMDB (see omdb_fields).
+    """
+    def __init__(self, path=DEFAULT_CACHE_FILE, ttl_days=30, max_entries=50000,
+                 miss_base_days=1, miss_max_days=180):
+        self.path = path
+        self.ttl = ttl_days * DAY
+        self.max_entries = max_entries
+        self.miss_base = miss_base_days * DAY
+        self.miss_max = miss_max_days * DAY
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS misses (
+                key TEXT PRIMARY KEY,
+                attempts INTEGER NOT NULL,
+                last_attempt REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS payloads (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, params):
+        """
+        Return the cached response for these parameters, or None if missing or expired
+        """
+        key = cache_key(params)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+        return json.loads(row[0])
+
+    def put(self, params, data):
+        """
+        Store a response and evict the oldest entries if the cache is over size
+        """
+        key = cache_key(params)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(data, ensure_ascii=False), now, now))
+            count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,))
+            self.conn.commit()
+
+    def purge_expired(self):
+        """
+        Drop every entry older than the TTL
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - self.ttl,))
+            self.conn.commit()
+
+    def recheck_interval(self, attempts):
+        """
+        Seconds to wait after the given number of misses before asking again
+        """
+        return min(self.miss_base * (2 ** (attempts - 1)), self.miss_max)
+
+    def record_miss(self, title, year=None):
+        """
+        Count one more 'Response: False' for this movie
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO misses (key, attempts, last_attempt) VALUES (?, 1, ?) "
+                "ON CONFLICT (key) DO UPDATE SET attempts = attempts + 1, last_attempt = excluded.last_attempt",
+                (lookup_key(title, year), time.time()))
+            self.conn.commit()
+
+    def clear_miss(self, title, year=None):
+        """
+        The movie resolved after all, forget its misses
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM misses WHERE key = ?", (lookup_key(title, year),))
+            self.conn.commit()
+
+    def miss_status(self, title, year=None):
+        """
+        Return (attempts, last_attempt) for a movie, (0, None) if it never missed
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT attempts, last_attempt FROM misses WHERE key = ?", (lookup_key(title, year),)).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+    def is_known_miss(self, title, year=None):
+        """
+        True while the re-check interval of a known miss has not expired
+        """
+        attempts, last_attempt = self.miss_status(title, year)
+        return attempts > 0 and time.time() - last_attempt < self.recheck_interval(attempts)
+
+    def known_miss_keys(self):
+        """
+        lookup_key() of every movie that should not be asked about yet, loaded in one query
+        """
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute("SELECT key, attempts, last_attempt FROM misses").fetchall()
+        return {key for key, attempts, last_attempt in rows
+                if now - last_attempt < self.recheck_interval(attempts)}
+
+    def store_payload(self, title, year, data):
+        """
+        Keep the raw response of a movie OMDB resolved, replacing any older one
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO payloads (key, payload, fetched_at) VALUES (?, ?, ?)",
+                (lookup_key(title, year), json.dumps(data, ensure_ascii=False), time.time()))
+            self.conn.commit()
+
+    def get_payload(self, title, year=None):
+        """
+        The stored raw response for this movie, or None
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload FROM payloads WHERE key = ?", (lookup_key(title, year),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def payload_keys(self):
+        """
+        lookup_key() of every movie with a stored payload, loaded in one query
+        """
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT key FROM payloads")}
+
+    def archive_cached_responses(self):
+        """
+        Copy successful responses still in the cache into the payloads table
+        Covers movies fetched before payloads were stored; returns how many were added.
+        """
+        with self.lock:
+            # cache_key starts with the same "title|year" as lookup_key
+            rows = self.conn.execute("SELECT key, payload, fetched_at FROM responses").fetchall()
+            archived = [('|'.join(key.split('|')[:2]), payload, fetched_at) for key, payload, fetched_at in rows
+                        if json.loads(payload).get('Response') == 'True']
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO payloads (key, payload, fetched_at) VALUES (?, ?, ?)", archived)
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    Open the shared cache file on first use
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = OmdbCache()
+    return _default_cache
+
@@ -0,0 +1,305 @@
+import os
+import random
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from key_pool import load_key_pool, mask_key
+from metrics import get_metrics
+from omdb_cache import cache_key, get_default_cache
+from omdb_fields import project
+
+# Set OMDB_URL to point the updaters at another server, such as omdb_stub.py
+OMDB_URL = os.environ.get('OMDB_URL', "http://www.omdbapi.com/")
+
+# Lookup outcomes
+HIT = 'hit'
+MISS = 'miss'
+THROTTLED = 'throttled'
+ERROR = 'error'
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Amazon image URLs end in ._V1_<operations>.<ext>, e.g. ._V1_SX300.jpg
+AMAZON_IMAGE_OPS = re.compile(r'\._V1_[^/]*?(\.(?:jpe?g|png|webp))$', re.IGNORECASE)
+POSTER_WIDTH = 600
+
+# omdb_requests_total outcome of non-200 answers by HTTP status, anything else counts as an error
+REQUEST_OUTCOMES = {401: 'refused', 429: 'throttled'}
+
+
+class LookupResult:
+    """
+    Outcome of one OMDB lookup
+    status is one of HIT, MISS, THROTTLED or ERROR, data is the raw OMDB
+    response for HIT and MISS
+    """
+    def __init__(self, status, data=None, error=None, from_cache=False):
+        self.status = status
+        self.data = data
+        self.error = error
+        self.from_cache = from_cache
+
+    def __repr__(self):
+        return f"LookupResult({self.status!r}, from_cache={self.from_cache})"
+
+
+class OmdbClient:
+    """
+    Shared OMDB client
+    One keep-alive session with a connection pool, every lookup reads
+    through the response cache, 429 and 5xx answers are retried with
+    jittered exponential backoff. API keys come from a KeyPool, so a key
+    that is throttled or out of quota fails over to the next one.
+    """
+    def __init__(self, key_pool, cache=None, timeout=10, max_retries=4,
+                 backoff_base=1.0, backoff_cap=30.0, pool_size=20, base_url=OMDB_URL):
+        self.key_pool = key_pool
+        self.cache = cache if cache is not None else get_default_cache()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.base_url = base_url
+        self.metrics = get_metrics()
+        self.inflight = {}
+        self.inflight_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def backoff(self, attempt, response=None):
+        """
+        Seconds to wait before retry number `attempt` (full jitter)
+        A Retry-After header from the server takes precedence
+        """
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def lookup(self, title, year=None, cache_only=False, **params):
+        """
+        Look up a movie by title (and year) and return a LookupResult
+        Extra keyword arguments are passed through as OMDB query parameters.
+        Concurrent lookups of the same movie share one request. With
+        cache_only, None is returned when answering would take a request.
+        """
+        params = dict(params, t=title)
+        if year:
+            params['y'] = year
+        if cache_only:
+            return self.cached(title, year, params)
+
+        key = cache_key(params)
+        with self.inflight_lock:
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[key] = {'done': threading.Event(), 'result': None}
+        if not leader:
+            # The same lookup is already on its way, wait for its answer
+            self.metrics.count('omdb_lookups_total', source='coalesced')
+            flight['done'].wait()
+            return flight['result']
+
+        try:
+            flight['result'] = self.fetch(title, year, params)
+        except BaseException as e:
+            flight['result'] = LookupResult(ERROR, error=str(e))
+            raise
+        finally:
+            with self.inflight_lock:
+                del self.inflight[key]
+            flight['done'].set()
+        return flight['result']
+
+    def cached(self, title, year, params):
+        """
+        Answer one lookup from the cache alone, None if it needs a request
+        """
+        data = self.cache.get(params)
+        if data is not None:
+            self.metrics.count('omdb_lookups_total', source='cache')
+            return LookupResult(HIT if data.get('Response') == 'True' else MISS, data, from_cache=True)
+
+        # Titles OMDB could not resolve are only asked about again once their re-check interval expires
+        if self.cache.is_known_miss(title, year):
+            self.metrics.count('omdb_lookups_total', source='known_miss')
+            return LookupResult(MISS, {'Response': 'False', 'Error': 'Known miss'}, from_cache=True)
+        return None
+
+    def fetch(self, title, year, params):
+        """
+        Answer one lookup from the cache or the network
+        """
+        result = self.cached(title, year, params)
+        if result is not None:
+            return result
+
+        if not self.key_pool.limits:
+            return LookupResult(ERROR, error="No OMDB API key configured")
+
+        self.metrics.count('omdb_lookups_total', source='network')
+        started = time.perf_counter()
+        result = self.fetch_remote(title, year, params)
+        self.metrics.observe('omdb_lookup_seconds', time.perf_counter() - started)
+        return result
+
+    def fetch_remote(self, title, year, params):
+        """
+        Ask OMDB, retrying and failing over between keys
+        """
+
+        status = ERROR
+        error = None
+        for attempt in range(self.max_retries + 1):
+            api_key = self.key_pool.acquire()
+            if api_key is None:
+                return LookupResult(THROTTLED, error="Every API key is out of quota for today")
+
+            response = None
+            try:
+                response = self.session.get(self.base_url, params=dict(params, apikey=api_key),
+                                            timeout=self.timeout)
+            except requests.RequestException as e:
+                self.metrics.count('omdb_requests_total', outcome='error')
+                status, error = ERROR, str(e)
+            else:
+                if response.status_code == 200:
+                    try:
+                        data = response.json()
+                    except ValueError as e:
+                        self.metrics.count('omdb_requests_total', outcome='error')
+                        return LookupResult(ERROR, error=f"Invalid JSON: {e}")
+                    found = data.get('Response') == 'True'
+                    self.metrics.count('omdb_requests_total', outcome='hit' if found else 'miss')
+                    if found:
+                        self.cache.put(params, data)
+                        self.cache.store_payload(title, year, data)
+                        self.cache.clear_miss(title, year)
+                        return LookupResult(HIT, data)
+                    # Misses go to the miss table so they are re-checked on their own schedule
+                    self.cache.record_miss(title, year)
+                    return LookupResult(MISS, data)
+                self.metrics.count('omdb_requests_total', outcome=REQUEST_OUTCOMES.get(response.status_code, 'error'))
+                if response.status_code == 401:
+                    # OMDB answers 401 both for an invalid key and for a used up daily limit
+                    self.key_pool.mark_exhausted(api_key)
+                    status, error = THROTTLED, f"HTTP 401 for key {mask_key(api_key)}"
+                    continue
+                if response.status_code == 429:
+                    # Rest this key, the pool hands out another one or waits for it
+                    self.key_pool.cool_down(api_key, self.backoff(attempt, response))
+                    status, error = THROTTLED, "HTTP 429"
+                    continue
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return LookupResult(ERROR, error=f"HTTP {response.status_code}")
+                status, error = ERROR, f"HTTP {response.status_code}"
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff(attempt, response))
+
+        return LookupResult(status, error=error)
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key=None):
+    """
+    Return the shared client for this API key so every caller reuses one connection pool
+    The client rotates over the keys in omdb_keys.json / OMDB_API_KEYS plus `api_key`
+    """
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = OmdbClient(load_key_pool(api_key))
+        return _clients[api_key]
+
+
+def upscale_poster_url(poster, width=POSTER_WIDTH):
+    """
+    OMDB returns a low resolution poster by default, ask Amazon for a larger one
+    Every image operation after _V1_ (size, quality, crop) is replaced with a
+    single resize, so SX300, SY300 and QL75_UY133_CR... thumbnails all map
+    to the same URL. Whether that image exists is checked by poster_stage.
+    """
+    if not poster:
+        return poster
+    return AMAZON_IMAGE_OPS.sub(f"._V1_SX{width}\\1", poster, count=1)
+
+
+def lookup_movie_cast(movie_title, movie_year=None, api_key=None, **params):
+    """
+    fetch_movie_cast with the LookupResult, returns (cast, result)
+    cast is [] for a MISS and None for THROTTLED or ERROR, which answered
+    nothing about the movie; result.from_cache is False only when a request
+    went out.
+    """
+    result = get_client(api_key).lookup(movie_title, movie_year, **params)
+    if result.status == THROTTLED:
+        print("API limit reached. Please try again later.")
+        return None, result
+    if result.status == ERROR:
+        print(f"Error fetching data for {movie_title}: {result.error}")
+        return None, result
+    if result.status != HIT:
+        return [], result
+    # The whole response is stored, the other fields can be projected later without a request
+    return project(result.data, ['cast'])['cast'], result
+
+
+def fetch_movie_cast(movie_title, movie_year=None, api_key=None, **params):
+    """
+    Fetch cast information for a movie using OMDB API
+    Returns the cast list, or None if the API is still throttling after retries
+    """
+    cast, result = lookup_movie_cast(movie_title, movie_year, api_key, **params)
+    return [] if result.status == ERROR else cast
+
+
+def lookup_movie_details(movie_title, movie_year=None, api_key=None, upscale_poster=False, cache_only=False,
+                         **params):
+    """
+    fetch_movie_details with the LookupResult, returns (details, result)
+    details holds empty fields for a MISS and is None for THROTTLED or
+    ERROR, which answered nothing about the movie; result.from_cache is
+    False only when a request went out. With cache_only no request is
+    made, and (None, None) means the answer is not cached.
+    """
+    result = get_client(api_key).lookup(movie_title, movie_year, cache_only=cache_only, **params)
+    if result is None:
+        return None, None
+    if result.status == THROTTLED:
+        print("API limit reached. Please try again later.")
+        return None, result
+    if result.status == ERROR:
+        print(f"Error fetching data for {movie_title}: {result.error}")
+        return None, result
+    if result.status != HIT:
+        return project(None), result
+
+    details = project(result.data)
+    if upscale_poster:
+        details['poster'] = upscale_poster_url(details['poster'])
+    return details, result
+
+
+def fetch_movie_details(movie_title, movie_year=None, api_key=None, upscale_poster=False, **params):
+    """
+    Fetch every catalog field OMDB has for a movie (see omdb_fields.FIELD_MAP):
+    cast, director, poster, released, runtime, genre, writer, plot and awards
+    Returns None if the API is still throttling after retries
+    """
+    details, result = lookup_movie_details(movie_title, movie_year, api_key, upscale_poster, **params)
+    return project(None) if result.status == ERROR else details
@@ -0,0 +1,92 @@
+import argparse
+
+from catalog_stream import CatalogWriter, iter_catalog
+from omdb_cache import get_default_cache
+
+
+def clean_value(value):
+    """
+    OMDB uses 'N/A' for missing values
+    """
+    if not value or value == 'N/A':
+        return ''
+    return value
+
+
+def split_names(value):
+    """
+    Split a comma separated OMDB name list into a list
+    """
+    value = clean_value(value)
+    return [name.strip() for name in value.split(',')] if value else []
+
+
+# Catalog field -> (OMDB response key, conversion); a new catalog field only needs a line here
+FIELD_MAP = {
+    'cast': ('Actors', split_names),
+    'director': ('Director', clean_value),
+    'poster': ('Poster', clean_value),
+    'released': ('Released', clean_value),
+    'runtime': ('Runtime', clean_value),
+    'genre': ('Genre', clean_value),
+    'writer': ('Writer', clean_value),
+    'plot': ('Plot', clean_value),
+    'awards': ('Awards', clean_value),
+}
+
+
+def project(data, fields=None):
+    """
+    Turn one raw OMDB response into catalog fields (all of FIELD_MAP by default)
+    A missing response gives every field its empty value.
+    """
+    data = data or {}
+    projected = {}
+    for field in fields or FIELD_MAP:
+        key, convert = FIELD_MAP[field]
+        projected[field] = convert(data.get(key))
+    return projected
+
+
+def reproject_catalog(catalog_file, output_file=None, fields=None, overwrite=False, cache=None):
+    """
+    Fill catalog fields from the stored OMDB payloads, without any request
+    Only empty fields are filled unless `overwrite` is set. Responses still
+    in the cache from before payloads were stored are archived first.
+    Returns (movies with a payload, fields filled).
+    """
+    cache = cache or get_default_cache()
+    archived = cache.archive_cached_responses()
+    if archived:
+        print(f"Archived {archived} cached responses as payloads")
+
+    with_payload = filled = 0
+    # The writer only replaces the file once every record has been read and written
+    with CatalogWriter(output_file or catalog_file) as writer:
+        for movie in iter_catalog(catalog_file):
+            data = cache.get_payload(movie.get('title'), movie.get('year')) if movie.get('title') else None
+            if data is not None:
+                with_payload += 1
+                for field, value in project(data, fields).items():
+                    if (overwrite or not movie.get(field)) and movie.get(field) != value:
+                        movie[field] = value
+                        filled += bool(value)
+            writer.write(movie)
+
+    print(f"Projected {', '.join(fields or FIELD_MAP)} for {with_payload} movies from stored payloads, "
+          f"{filled} values filled, no API requests made")
+    return with_payload, filled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill catalog fields from stored OMDB responses, without API requests")
+    parser.add_argument("catalog", nargs="?", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--output", help="Catalog to write (defaults to rewriting the input)")
+    parser.add_argument("--fields", help=f"Comma separated fields (default: {','.join(FIELD_MAP)})")
+    parser.add_argument("--overwrite", action="store_true", help="Replace values that are already set")
+    args = parser.parse_args()
+    fields = [field.strip() for field in args.fields.split(',')] if args.fields else None
+    unknown = [field for field in fields or [] if field not in FIELD_MAP]
+    if unknown:
+        parser.error(f"Unknown fields: {', '.join(unknown)} (known: {', '.join(FIELD_MAP)})")
+    reproject_catalog(args.catalog, args.output, fields, args.overwrite)
@@ -0,0 +1,236 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from catalog_stream import iter_catalog
+from omdb_cache import lookup_key, normalize_title
+
+SEARCH_PAGE_SIZE = 10
+
+# Width asked for by an Amazon image URL, e.g. ._V1_SX600.jpg
+IMAGE_WIDTH = re.compile(r'\._V1_SX(\d+)\.')
+
+
+def imdb_id_for(movie):
+    return movie.get('imdb_id') or f"tt{movie.get('index') or 0:07d}"
+
+
+def omdb_payload(movie):
+    """
+    Turn a catalog record into the response OMDB gives for it
+    """
+    def value(field):
+        return movie.get(field) or 'N/A'
+
+    return {
+        'Title': movie.get('title'),
+        'Year': str(movie.get('year') or 'N/A'),
+        'Rated': 'N/A',
+        'Released': value('released'),
+        'Runtime': value('runtime'),
+        'Genre': value('genre'),
+        'Director': value('director'),
+        'Writer': value('writer'),
+        'Actors': ', '.join(movie.get('cast') or []) or 'N/A',
+        'Plot': value('plot'),
+        'Language': 'Tamil',
+        'Country': 'India',
+        'Awards': value('awards'),
+        'Poster': movie.get('poster') or movie.get('image') or 'N/A',
+        'imdbRating': str(movie.get('rating') or 'N/A'),
+        'imdbID': imdb_id_for(movie),
+        'Type': 'movie',
+        'Response': 'True'
+    }
+
+
+class StubCorpus:
+    """
+    Fixture movies indexed the ways OMDB can be asked for them
+    """
+    def __init__(self, movies):
+        self.by_key = {}
+        self.by_id = {}
+        self.titles = []
+        for movie in movies:
+            if not movie.get('title'):
+                continue
+            payload = omdb_payload(movie)
+            self.by_key.setdefault(lookup_key(movie['title'], movie.get('year')), payload)
+            self.by_key.setdefault(lookup_key(movie['title']), payload)
+            self.by_id[payload['imdbID']] = payload
+            self.titles.append((normalize_title(movie['title']), payload))
+
+    @classmethod
+    def load(cls, path):
+        return cls(iter_catalog(path))
+
+    def by_title(self, title, year=None):
+        return self.by_key.get(lookup_key(title, year))
+
+    def search(self, text, year=None):
+        text = normalize_title(text)
+        return [payload for title, payload in self.titles
+                if text in title and (not year or payload['Year'] == str(year))]
+
+
+class StubOptions:
+    """
+    How badly the stub behaves
+    latency is the base delay of every answer, jitter a random extra on top;
+    error_rate and throttle_rate are the fractions of requests answered with
+    a 503 or a 429; daily_limit refuses a key (401) after that many requests;
+    missing_poster_rate is the fraction of images asked for wider than 300px
+    that answer 404, the same images every time
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, daily_limit=None, seed=None, missing_poster_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.daily_limit = daily_limit
+        self.random = random.Random(seed)
+        self.missing_poster_rate = missing_poster_rate
+
+    def image_exists(self, path):
+        match = IMAGE_WIDTH.search(path)
+        if not match or int(match.group(1)) <= 300:
+            return True
+        image = path[:match.start()]
+        return zlib.crc32(image.encode('utf-8')) / 2 ** 32 >= self.missing_poster_rate
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_HEAD(self):
+        """
+        Poster checks: any path is an image, see StubOptions.missing_poster_rate
+        """
+        options = self.server.options
+        with self.server.lock:
+            delay = options.latency + options.random.uniform(0, options.jitter)
+        if delay:
+            time.sleep(delay)
+        self.send_response(200 if options.image_exists(urlparse(self.path).path) else 404)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        options = server.options
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+
+        with server.lock:
+            roll = options.random.random()
+            delay = options.latency + options.random.uniform(0, options.jitter)
+        if delay:
+            time.sleep(delay)
+
+        api_key = params.get('apikey')
+        if not api_key:
+            return self.send_json(401, {'Response': 'False', 'Error': 'No API key provided.'})
+        with server.lock:
+            server.requests += 1
+            used = server.usage.get(api_key, 0)
+            if options.daily_limit is not None and used >= options.daily_limit:
+                return self.send_json(401, {'Response': 'False', 'Error': 'Request limit reached!'})
+            server.usage[api_key] = used + 1
+
+        if roll < options.throttle_rate:
+            return self.send_json(429, {'Response': 'False', 'Error': 'Too many requests'},
+                                  {'Retry-After': str(options.retry_after)})
+        if roll < options.throttle_rate + options.error_rate:
+            return self.send_json(503, {'Response': 'False', 'Error': 'Service unavailable'})
+
+        corpus = server.corpus
+        if 'i' in params:
+            payload = corpus.by_id.get(params['i'])
+            if payload is None:
+                return self.send_json(200, {'Response': 'False', 'Error': 'Incorrect IMDb ID.'})
+            return self.send_json(200, payload)
+        if 't' in params:
+            payload = corpus.by_title(params['t'], params.get('y'))
+            if payload is None:
+                return self.send_json(200, {'Response': 'False', 'Error': 'Movie not found!'})
+            return self.send_json(200, payload)
+        if 's' in params:
+            matches = corpus.search(params['s'], params.get('y'))
+            if not matches:
+                return self.send_json(200, {'Response': 'False', 'Error': 'Movie not found!'})
+            page = max(int(params.get('page') or 1), 1)
+            start = (page - 1) * SEARCH_PAGE_SIZE
+            return self.send_json(200, {
+                'Search': [{k: m[k] for k in ('Title', 'Year', 'imdbID', 'Type', 'Poster')}
+                           for m in matches[start:start + SEARCH_PAGE_SIZE]],
+                'totalResults': str(len(matches)),
+                'Response': 'True'
+            })
+        self.send_json(200, {'Response': 'False', 'Error': 'Something went wrong.'})
+
+
+def start_stub(corpus, host='127.0.0.1', port=0, options=None):
+    """
+    Serve `corpus` in a background thread, returns (server, url)
+    Port 0 picks a free port. Stop it with server.shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.corpus = corpus
+    server.options = options or StubOptions()
+    server.lock = threading.Lock()
+    server.usage = {}
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OMDB API, served from a catalog file")
+    parser.add_argument("--corpus", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with a 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--daily-limit", type=int, help="Requests per API key before it is refused with a 401")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--missing-poster-rate", type=float, default=0.0,
+                        help="Fraction of upscaled poster URLs answered with a 404 (HEAD)")
+    args = parser.parse_args()
+
+    corpus = StubCorpus.load(args.corpus)
+    options = StubOptions(args.latency, args.jitter, args.error_rate, args.throttle_rate,
+                          args.retry_after, args.daily_limit, args.seed, args.missing_poster_rate)
+    server, url = start_stub(corpus, args.host, args.port, options)
+    print(f"Serving {len(corpus.by_id)} movies from {args.corpus} at {url}")
+    print(f"Point the updaters at it with OMDB_URL={url}, and poster checks with POSTER_CHECK_URL={url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
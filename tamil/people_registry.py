@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import re
+import unicodedata
+
+from catalog_stream import atomic_write_bytes, iter_catalog, write_catalog
+
+DEFAULT_REGISTRY_FILE = "people_registry.json"
+
+# Spellings known to be the same person, variant -> canonical name
+DEFAULT_ALIASES = {
+    "Ramya Krishna": "Ramya Krishnan",
+}
+
+# Fields holding people: a list of names (cast) or a comma separated string
+PERSON_FIELDS = ['cast', 'director', 'writer']
+
+ROLE_NOTE = re.compile(r'\s*\([^)]*\)')
+
+
+def name_key(name):
+    """
+    Spelling-insensitive identity of a name: accents, case, dots and
+    spacing are ignored, so "M.S. Bhaskar" and "M S Bhaskar" match
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    return ''.join(c for c in decomposed.lower() if c.isalnum())
+
+
+def split_people(value):
+    """
+    Names in a cast list or a comma separated director/writer string, role notes removed
+    """
+    if not value:
+        return []
+    names = value if isinstance(value, list) else value.split(',')
+    names = [ROLE_NOTE.sub('', name).strip() for name in names]
+    return [name for name in names if name_key(name)]
+
+
+def within_one_edit(a, b):
+    if abs(len(a) - len(b)) > 1 or a == b:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    # one substitution, or one insertion in the longer name
+    return a[i + 1:] == b[i + 1:] if len(a) == len(b) else a[i:] == b[i + 1:]
+
+
+class PeopleRegistry:
+    """
+    Canonical people with stable integer IDs
+    Every spelling seen is mapped (by name_key) to one person; aliases merge
+    spellings that differ by more than name_key ignores. IDs are never
+    reused, so the registry file keeps them stable from one run to the next.
+    """
+    def __init__(self, people=None, aliases=None, next_id=1):
+        # people is {id: canonical name}, aliases is {variant: canonical name}
+        self.people = dict(people or {})
+        self.next_id = max([next_id] + [person_id + 1 for person_id in self.people])
+        self.by_key = {name_key(name): person_id for person_id, name in self.people.items()}
+        self.aliases = {}
+        for variant, canonical in dict(DEFAULT_ALIASES, **(aliases or {})).items():
+            self.add_alias(variant, canonical)
+
+    @classmethod
+    def load(cls, path=DEFAULT_REGISTRY_FILE):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        return cls({int(person_id): name for person_id, name in data.get('people', {}).items()},
+                   data.get('aliases', {}), data.get('next_id', 1))
+
+    def save(self, path=DEFAULT_REGISTRY_FILE):
+        data = {
+            'next_id': self.next_id,
+            'people': {str(person_id): name for person_id, name in sorted(self.people.items())},
+            'aliases': dict(sorted(self.aliases.items()))
+        }
+        atomic_write_bytes(path, json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'))
+
+    def add_alias(self, variant, canonical):
+        """
+        Make `variant` resolve to the same person as `canonical`
+        A variant already registered as a person of its own is merged into
+        the canonical one and its ID retired.
+        """
+        self.aliases[variant] = canonical
+        person_id = self.resolve(canonical)
+        variant_id = self.by_key.get(name_key(variant))
+        if variant_id is not None and variant_id != person_id:
+            self.people.pop(variant_id, None)
+        self.by_key[name_key(variant)] = person_id
+        return person_id
+
+    def resolve(self, name):
+        """
+        ID of the person with this name, registering a new person if needed
+        """
+        key = name_key(name)
+        if key not in self.by_key:
+            self.by_key[key] = self.next_id
+            self.people[self.next_id] = name
+            self.next_id += 1
+        return self.by_key[key]
+
+    def name(self, person_id):
+        return self.people.get(person_id)
+
+    def suggest_aliases(self):
+        """
+        Pairs of registered names one letter apart ("Krishna"/"Krishnan"), for a human to review
+        """
+        blocks = {}
+        for person_id, name in self.people.items():
+            key = name_key(name)
+            blocks.setdefault(key[:4], []).append((key, name))
+        pairs = []
+        for names in blocks.values():
+            for i, (key, name) in enumerate(names):
+                for other_key, other_name in names[i + 1:]:
+                    if within_one_edit(key, other_key):
+                        pairs.append((name, other_name))
+        return sorted(pairs)
+
+
+def build_people_index(catalog_file, registry, ids_file=None):
+    """
+    Resolve every person in the catalog to an ID
+    Returns the person -> films index ({'people': [[id, name]], 'films':
+    {role: {id: [movie index, ...]}}}); if `ids_file` is given, also writes
+    the catalog with cast, director and writer replaced by lists of IDs.
+    """
+    films = {field: {} for field in PERSON_FIELDS}
+    records = 0
+
+    def rewritten():
+        nonlocal records
+        for movie in iter_catalog(catalog_file):
+            records += 1
+            for field in PERSON_FIELDS:
+                if field not in movie:
+                    continue
+                ids = []
+                for name in split_people(movie[field]):
+                    person_id = registry.resolve(name)
+                    if person_id not in ids:
+                        ids.append(person_id)
+                        films[field].setdefault(person_id, []).append(movie.get('index'))
+                movie[field] = ids
+            yield movie
+
+    if ids_file:
+        write_catalog(ids_file, rewritten(), indent=None)
+    else:
+        for _ in rewritten():
+            pass
+
+    used = sorted({person_id for role in films.values() for person_id in role})
+    return {
+        'records': records,
+        'people': [[person_id, registry.name(person_id)] for person_id in used],
+        'films': {field: {str(person_id): sorted(indexes) for person_id, indexes in sorted(role.items())}
+                  for field, role in films.items()}
+    }
+
+
+def write_people_index(catalog_file, out_dir=None, registry_file=DEFAULT_REGISTRY_FILE):
+    """
+    Write <stem>.people.json (person -> films) and <stem>.ids.json (records referencing people by ID)
+    """
+    out_dir = out_dir or os.path.dirname(os.path.abspath(catalog_file))
+    stem = os.path.splitext(os.path.basename(catalog_file))[0]
+    registry = PeopleRegistry.load(registry_file)
+
+    ids_file = os.path.join(out_dir, stem + ".ids.json")
+    index = build_people_index(catalog_file, registry, ids_file)
+    index_file = os.path.join(out_dir, stem + ".people.json")
+    atomic_write_bytes(index_file, json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    registry.save(registry_file)
+
+    print(f"{len(index['people'])} people in {index['records']} movies, "
+          f"{len(registry.people)} in the registry ({registry_file})")
+    print(f"Person -> films index: {index_file} ({os.path.getsize(index_file)} bytes)")
+    print(f"Catalog with person IDs: {ids_file} ({os.path.getsize(ids_file)} bytes)")
+    return index_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Canonical people registry and person -> films index")
+    parser.add_argument("catalog", nargs="?", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--out-dir", help="Directory to write into (defaults to the catalog's directory)")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY_FILE)
+    parser.add_argument("--alias", action="append", default=[], metavar="VARIANT=CANONICAL",
+                        help="Record that two spellings are the same person")
+    parser.add_argument("--suggest", action="store_true", help="List names one letter apart that may be the same person")
+    args = parser.parse_args()
+
+    if args.alias:
+        registry = PeopleRegistry.load(args.registry)
+        for alias in args.alias:
+            variant, _, canonical = alias.partition('=')
+            registry.add_alias(variant.strip(), canonical.strip())
+        registry.save(args.registry)
+
+    write_people_index(args.catalog, args.out_dir, args.registry)
+
+    if args.suggest:
+        for name, other in PeopleRegistry.load(args.registry).suggest_aliases():
+            print(f"  possibly the same person: {name} / {other}")
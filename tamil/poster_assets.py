@@ -0,0 +1,200 @@
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from catalog_stream import atomic_write_bytes, iter_catalog, write_catalog
+from poster_stage import make_session
+
+ASSET_DIR = "assets"
+MANIFEST_NAME = "manifest.json"
+# {index: data URI}, loaded by the pages next to the catalog instead of being part of it
+PLACEHOLDERS_NAME = "placeholders.json"
+
+# Card thumbnail widths, served through srcset
+THUMB_WIDTHS = [160, 320, 480]
+THUMB_QUALITY = 75
+
+# The placeholder is inlined into placeholders.json as a data: URI, so it stays tiny
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_QUALITY = 30
+
+# Images handed to a worker at a time
+CHUNK_SIZE = 50
+
+
+def source_url(movie):
+    """
+    The image a movie's assets are made from: its poster, or the card image
+    """
+    for field in ('poster', 'image'):
+        url = movie.get(field)
+        if url and url != 'N/A':
+            return url
+    return None
+
+
+def content_path(digest, suffix):
+    """
+    Store path of an asset, relative to the asset directory: ab/abcdef0123456789<suffix>
+    """
+    return f"{digest[:2]}/{digest[:16]}{suffix}"
+
+
+def download(session, url, asset_dir, timeout=20):
+    """
+    Fetch one image into the store, returns its content hash or None
+    Identical images (the same poster behind two URLs) are stored once.
+    """
+    try:
+        response = session.get(url, timeout=timeout)
+    except requests.RequestException as e:
+        print(f"Could not download {url}: {e}")
+        return None
+    if response.status_code != 200 or not response.content:
+        print(f"Could not download {url}: HTTP {response.status_code}")
+        return None
+    digest = hashlib.sha256(response.content).hexdigest()
+    path = os.path.join(asset_dir, content_path(digest, ".orig"))
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write_bytes(path, response.content)
+    return digest
+
+
+def make_thumbnails(asset_dir, digests):
+    """
+    Worker: WebP thumbnails and the blur placeholder of a batch of stored images
+    Returns {digest: {'thumbnails': {width: path}, 'placeholder': data URI}},
+    images Pillow cannot read are left out.
+    """
+    results = {}
+    for digest in digests:
+        try:
+            with Image.open(os.path.join(asset_dir, content_path(digest, ".orig"))) as source:
+                image = source.convert('RGB')
+        except (OSError, ValueError) as e:
+            print(f"Could not read image {digest[:16]}: {e}")
+            continue
+
+        thumbnails = {}
+        # Never upscale, a small source gets one thumbnail at its own width instead of the larger ones
+        for width in sorted({min(width, image.width) for width in THUMB_WIDTHS}):
+            size = (width, max(1, round(image.height * width / image.width)))
+            path = content_path(digest, f"-{width}.webp")
+            out = io.BytesIO()
+            image.resize(size, Image.LANCZOS).save(out, 'WEBP', quality=THUMB_QUALITY, method=4)
+            atomic_write_bytes(os.path.join(asset_dir, path), out.getvalue())
+            thumbnails[str(width)] = path
+
+        out = io.BytesIO()
+        tiny = (PLACEHOLDER_WIDTH, max(1, round(image.height * PLACEHOLDER_WIDTH / image.width)))
+        image.resize(tiny, Image.BILINEAR).save(out, 'WEBP', quality=PLACEHOLDER_QUALITY)
+        placeholder = "data:image/webp;base64," + base64.b64encode(out.getvalue()).decode('ascii')
+        results[digest] = {'thumbnails': thumbnails, 'placeholder': placeholder}
+    return results
+
+
+def load_asset_manifest(asset_dir):
+    try:
+        with open(os.path.join(asset_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'urls': {}, 'images': {}}
+
+
+def build_poster_assets(movies, asset_dir, prefix=ASSET_DIR, download_workers=16, workers=None):
+    """
+    Give every movie local thumbnails and a blur placeholder
+    Source images are downloaded once into a content-addressed store under
+    `asset_dir`; thumbnails are made on a process pool. assets/manifest.json
+    maps each URL to its image hash and each hash to its assets, so a re-run
+    only downloads new URLs and only encodes images it has not seen. Each
+    movie gets 'thumbnails' ({width: path}, paths starting with `prefix`);
+    the placeholders stay out of the catalog, in assets/placeholders.json
+    keyed by index. Returns the number of (downloaded, encoded) images.
+    """
+    os.makedirs(asset_dir, exist_ok=True)
+    manifest = load_asset_manifest(asset_dir)
+    urls, images = manifest['urls'], manifest['images']
+
+    def stored(digest):
+        return digest in images and all(os.path.exists(os.path.join(asset_dir, path))
+                                        for path in images[digest]['thumbnails'].values())
+
+    wanted = {source_url(movie) for movie in movies} - {None}
+    new_urls = sorted(url for url in wanted if url not in urls
+                      or not os.path.exists(os.path.join(asset_dir, content_path(urls[url], ".orig"))))
+    if new_urls:
+        session = make_session(download_workers)
+        with ThreadPoolExecutor(max_workers=download_workers) as executor:
+            for url, digest in zip(new_urls, executor.map(lambda url: download(session, url, asset_dir), new_urls)):
+                if digest:
+                    urls[url] = digest
+        session.close()
+
+    new_images = sorted({urls[url] for url in wanted if url in urls and not stored(urls[url])})
+    if new_images:
+        chunks = [new_images[i:i + CHUNK_SIZE] for i in range(0, len(new_images), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for results in executor.map(make_thumbnails, [asset_dir] * len(chunks), chunks):
+                images.update(results)
+
+    placeholders = {}
+    for movie in movies:
+        digest = urls.get(source_url(movie))
+        # Catalogs written before placeholders moved out still carry them
+        movie.pop('placeholder', None)
+        if digest in images:
+            movie['thumbnails'] = {width: f"{prefix}/{path}"
+                                   for width, path in images[digest]['thumbnails'].items()}
+            if movie.get('index') is not None:
+                placeholders[movie['index']] = images[digest]['placeholder']
+        else:
+            movie.pop('thumbnails', None)
+
+    atomic_write_bytes(os.path.join(asset_dir, MANIFEST_NAME),
+                       json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+    atomic_write_bytes(os.path.join(asset_dir, PLACEHOLDERS_NAME),
+                       json.dumps(placeholders, separators=(',', ':')).encode('utf-8'))
+    return len(new_urls), len(new_images)
+
+
+def write_poster_assets(catalog_file, out_dir=None, output_file=None, workers=None):
+    """
+    Build the assets next to the catalog (<out_dir>/assets) and write the
+    catalog back with the asset fields
+    """
+    if Image is None:
+        print("Pillow is not installed, skipping poster thumbnails (pip install Pillow)")
+        return None
+    out_dir = out_dir or os.path.dirname(os.path.abspath(catalog_file))
+    movies = list(iter_catalog(catalog_file))
+    started = time.monotonic()
+    downloaded, encoded = build_poster_assets(movies, os.path.join(out_dir, ASSET_DIR), workers=workers)
+    write_catalog(output_file or catalog_file, movies)
+    with_assets = sum(1 for movie in movies if 'thumbnails' in movie)
+    print(f"Poster assets: {with_assets} of {len(movies)} movies, {downloaded} images downloaded, "
+          f"{encoded} encoded in {time.monotonic() - started:.1f}s")
+    return with_assets
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download posters once and make local WebP thumbnails and blur placeholders")
+    parser.add_argument("catalog", nargs="?", default="../tamil2/imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--out-dir", help="Directory to write the assets/ folder into (defaults to the catalog's directory)")
+    parser.add_argument("--output", help="Catalog to write (defaults to rewriting the input)")
+    parser.add_argument("--workers", type=int, help="Encoding processes (defaults to the number of CPUs)")
+    args = parser.parse_args()
+    write_poster_assets(args.catalog, args.out_dir, args.output, args.workers)
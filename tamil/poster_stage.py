@@ -0,0 +1,198 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from catalog_stream import iter_catalog, write_catalog
+from metrics import get_metrics
+from omdb_client import upscale_poster_url
+
+DEFAULT_VERDICTS_FILE = "poster_verdicts.sqlite3"
+
+# Set POSTER_CHECK_URL to send the HEAD checks to another server, such as omdb_stub.py
+POSTER_CHECK_URL = os.environ.get('POSTER_CHECK_URL')
+
+# Answers meaning the image does not exist; 5xx, 429 and timeouts leave the URL unchecked
+MISSING_STATUS_CODES = {400, 403, 404, 410}
+
+DAY = 24 * 60 * 60
+
+
+class PosterVerdicts:
+    """
+    SQLite cache of whether a poster URL exists
+    Images that exist are re-checked after `ok_days`, missing ones after
+    `missing_days`; errors are never cached.
+    """
+    def __init__(self, path=DEFAULT_VERDICTS_FILE, ok_days=30, missing_days=7):
+        self.path = path
+        self.ok_ttl = ok_days * DAY
+        self.missing_ttl = missing_days * DAY
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                url TEXT PRIMARY KEY,
+                ok INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, url):
+        """
+        True or False if the URL was checked recently, None otherwise
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT ok, checked_at FROM verdicts WHERE url = ?", (url,)).fetchone()
+        if row is None or time.time() - row[1] > (self.ok_ttl if row[0] else self.missing_ttl):
+            return None
+        return bool(row[0])
+
+    def put_many(self, verdicts):
+        """
+        Store {url: (ok, status)} in one transaction
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO verdicts (url, ok, status, checked_at) VALUES (?, ?, ?, ?)",
+                [(url, int(ok), status, now) for url, (ok, status) in verdicts.items()])
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def poster_candidates(movie):
+    """
+    Poster URLs to try, best first: the upscaled poster, the poster as OMDB
+    gave it, then the same for the card image
+    """
+    candidates = []
+    for url in (movie.get('poster'), movie.get('image')):
+        if not url or url == 'N/A':
+            continue
+        for candidate in (upscale_poster_url(url), url):
+            if candidate not in candidates:
+                candidates.append(candidate)
+    return candidates
+
+
+def check_url(session, url, timeout=10):
+    """
+    HEAD one image, returns (ok, status) with ok None when the answer says nothing
+    """
+    target = url
+    if POSTER_CHECK_URL:
+        parts = urlsplit(url)
+        target = POSTER_CHECK_URL.rstrip('/') + parts.path + (f"?{parts.query}" if parts.query else '')
+    try:
+        response = session.head(target, timeout=timeout, allow_redirects=True)
+    except requests.RequestException:
+        return None, 0
+    if response.status_code == 200:
+        return True, 200
+    if response.status_code in MISSING_STATUS_CODES:
+        return False, response.status_code
+    return None, response.status_code
+
+
+def make_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def resolve_posters(movies, concurrency=16, verdicts=None, timeout=10):
+    """
+    Set each movie's `poster` to its best candidate that exists
+    All the URLs a round needs are checked concurrently, one HEAD per
+    distinct URL, and verdicts are cached by URL across runs. A movie only
+    falls back to its next candidate once the previous one is known to be
+    missing; if a check fails for another reason the poster is left as it
+    was. Returns a Counter of outcomes: hires, original, missing, unchecked.
+    """
+    own_verdicts = verdicts is None
+    verdicts = verdicts if verdicts is not None else PosterVerdicts()
+    metrics = get_metrics()
+    session = make_session(concurrency)
+    # URL -> True, False, or None for a check that failed, as seen in this run
+    known = {}
+    pending = {position: poster_candidates(movie) for position, movie in enumerate(movies)}
+    pending = {position: candidates for position, candidates in pending.items() if candidates}
+    stats = Counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while pending:
+            to_check = set()
+            for position, candidates in list(pending.items()):
+                for url in candidates:
+                    if url not in known:
+                        cached = verdicts.get(url)
+                        if cached is None:
+                            to_check.add(url)
+                            break
+                        known[url] = cached
+                        metrics.count('poster_checks_total', outcome='cached')
+                    if known[url] is None:
+                        stats['unchecked'] += 1
+                        del pending[position]
+                        break
+                    if known[url]:
+                        movies[position]['poster'] = url
+                        stats['hires' if upscale_poster_url(url) == url and '_V1_' in url else 'original'] += 1
+                        del pending[position]
+                        break
+                else:
+                    movies[position]['poster'] = ''
+                    stats['missing'] += 1
+                    del pending[position]
+
+            if not to_check:
+                break
+            urls = sorted(to_check)
+            results = list(executor.map(lambda url: check_url(session, url, timeout), urls))
+            checked = {}
+            for url, (ok, status) in zip(urls, results):
+                known[url] = ok
+                metrics.count('poster_checks_total', outcome={True: 'ok', False: 'missing'}.get(ok, 'error'))
+                if ok is not None:
+                    checked[url] = (ok, status)
+            verdicts.put_many(checked)
+
+    session.close()
+    if own_verdicts:
+        verdicts.close()
+    for outcome, count in stats.items():
+        metrics.count('posters_total', count, outcome=outcome)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upscale and verify the poster URL of every movie")
+    parser.add_argument("catalog", nargs="?", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--output", help="Catalog to write (defaults to rewriting the input)")
+    parser.add_argument("--concurrency", type=int, default=16, help="HEAD requests in flight")
+    parser.add_argument("--verdicts", default=DEFAULT_VERDICTS_FILE, help="Verdict cache file")
+    args = parser.parse_args()
+
+    movies = list(iter_catalog(args.catalog))
+    started = time.monotonic()
+    stats = resolve_posters(movies, args.concurrency, PosterVerdicts(args.verdicts))
+    write_catalog(args.output or args.catalog, movies)
+    print(f"Resolved {sum(stats.values())} posters in {time.monotonic() - started:.1f}s: "
+          f"{stats['hires']} upscaled, {stats['original']} original size, "
+          f"{stats['missing']} missing, {stats['unchecked']} left unchecked")
@@ -0,0 +1,149 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog_delta import record_hash
+from catalog_stream import atomic_write_bytes, iter_catalog
+
+PAGE_DIR = "movie"
+MANIFEST_NAME = "manifest.json"
+TEMPLATE_NAME = "movie.template.html"
+
+# Pages handed to a worker at a time
+CHUNK_SIZE = 200
+
+
+def text(value):
+    if isinstance(value, list):
+        value = ', '.join(str(v) for v in value)
+    return html.escape(str(value)) if value else ''
+
+
+def render_page(template, movie):
+    """
+    Fill the <!-- FIELD --> placeholders of the template, the same scheme as detail.template.html
+    """
+    rating = ''
+    if movie.get('rating'):
+        rating = (f'<div class="flex items-center bg-yellow-600 px-3 py-1 rounded-full">'
+                  f'<i class="fas fa-star mr-1"></i><span>{text(movie["rating"])}</span></div>')
+    cast = ''.join(f'<div class="cast-chip">{text(actor)}</div>' for actor in movie.get('cast') or [])
+    description = f"{movie.get('title') or ''} ({movie.get('year') or ''})"
+    if movie.get('director'):
+        description += f", directed by {movie['director']}"
+
+    values = {
+        'INDEX': text(movie.get('index')),
+        'TITLE': text(movie.get('title')),
+        'YEAR': text(movie.get('year')),
+        'DESCRIPTION': text(description),
+        'POSTER': text(movie.get('poster') or movie.get('image')),
+        'RATING': rating,
+        'GENRE': text(movie.get('genre')),
+        'PLOT': text(movie.get('plot')) or 'No plot available.',
+        'CAST': cast or '<div class="cast-chip">Cast not available</div>',
+        'DIRECTOR': text(movie.get('director')) or 'Unknown',
+        'WRITER': text(movie.get('writer')) or 'Unknown',
+        'RELEASED': text(movie.get('released')) or 'Unknown',
+        'RUNTIME': text(movie.get('runtime')) or 'Unknown',
+        'AWARDS': text(movie.get('awards')) or 'None',
+    }
+    page = template
+    for name, value in values.items():
+        page = page.replace(f"<!-- {name} -->", value)
+    return page
+
+
+def page_hash(template_hash, movie):
+    """
+    A page changes when its record or the template changes
+    """
+    return hashlib.sha256(f"{template_hash}:{record_hash(movie)}".encode('utf-8')).hexdigest()[:16]
+
+
+def render_chunk(template_file, page_dir, movies):
+    """
+    Worker: render and write a batch of pages
+    """
+    with open(template_file, 'r', encoding='utf-8') as f:
+        template = f.read()
+    for movie in movies:
+        atomic_write_bytes(os.path.join(page_dir, f"{movie['index']}.html"),
+                           render_page(template, movie).encode('utf-8'))
+    return len(movies)
+
+
+def load_page_manifest(page_dir):
+    try:
+        with open(os.path.join(page_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'pages': {}}
+
+
+def prerender_movies(catalog_file, out_dir=None, template_file=None, workers=None):
+    """
+    Render <out_dir>/movie/<index>.html for every movie in the catalog
+    movie/manifest.json keeps a hash of each page's record and template, so
+    only new and changed movies are rendered again (all of them when the
+    template changes) and pages of removed movies are deleted. Rendering is
+    spread over a process pool.
+    """
+    out_dir = out_dir or os.path.dirname(os.path.abspath(catalog_file))
+    template_file = template_file or os.path.join(out_dir, TEMPLATE_NAME)
+    page_dir = os.path.join(out_dir, PAGE_DIR)
+    os.makedirs(page_dir, exist_ok=True)
+
+    with open(template_file, 'rb') as f:
+        template_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+    old_pages = load_page_manifest(page_dir).get('pages', {})
+
+    pages = {}
+    stale = []
+    for movie in iter_catalog(catalog_file):
+        if movie.get('index') is None:
+            continue
+        key = str(movie['index'])
+        pages[key] = page_hash(template_hash, movie)
+        if old_pages.get(key) != pages[key] or not os.path.exists(os.path.join(page_dir, f"{key}.html")):
+            stale.append(movie)
+
+    started = time.monotonic()
+    rendered = 0
+    if stale:
+        chunks = [stale[i:i + CHUNK_SIZE] for i in range(0, len(stale), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for count in executor.map(render_chunk, [template_file] * len(chunks),
+                                      [page_dir] * len(chunks), chunks):
+                rendered += count
+
+    removed = 0
+    for key in old_pages:
+        if key not in pages:
+            try:
+                os.remove(os.path.join(page_dir, f"{key}.html"))
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+    manifest = {'template': template_hash, 'pages': pages}
+    atomic_write_bytes(os.path.join(page_dir, MANIFEST_NAME),
+                       json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+
+    print(f"Prerendered {rendered} of {len(pages)} movie pages in {time.monotonic() - started:.1f}s, "
+          f"{removed} removed ({page_dir})")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a static movie/<index>.html page per movie")
+    parser.add_argument("catalog", nargs="?", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--out-dir", help="Directory to write the movie/ folder into (defaults to the catalog's directory)")
+    parser.add_argument("--template", help=f"Page template (defaults to {TEMPLATE_NAME} in the output directory)")
+    parser.add_argument("--workers", type=int, help="Rendering processes (defaults to the number of CPUs)")
+    args = parser.parse_args()
+    prerender_movies(args.catalog, args.out_dir, args.template, args.workers)
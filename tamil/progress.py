@@ -0,0 +1,107 @@
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+from metrics import get_metrics
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressReporter:
+    """
+    One status line for a long run instead of several prints per record
+    The line (done/total, rate, ETA, API quota left) is redrawn at most every
+    `interval` seconds; on a terminal it is updated in place, in a CI log a
+    new line is written each time. Per-record details go to an optional
+    JSON-lines log, filtered by `log_level`.
+    """
+    def __init__(self, total, interval=2.0, log_file=None, log_level='info', stream=None):
+        self.total = total
+        self.done = 0
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.in_place = self.stream.isatty()
+        self.level = LEVELS[log_level]
+        self.log_file = open(log_file, 'a', encoding='utf-8') if log_file else None
+        self.started = time.monotonic()
+        self.last_drawn = None
+        self.line_open = False
+
+    def log(self, level, event, **fields):
+        """
+        Write one JSON line to the log if `level` passes the configured level
+        """
+        if self.log_file is None or LEVELS[level] < self.level:
+            return
+        entry = {'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                 'level': level, 'event': event}
+        entry.update(fields)
+        self.log_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def message(self, text, level='info', **fields):
+        """
+        Print a line that should stay visible (start, stop reasons, errors)
+        """
+        self.end_line()
+        print(text, file=self.stream)
+        self.log(level, 'message', text=text, **fields)
+
+    def advance(self, count=1, **fields):
+        """
+        Count finished records, `fields` describe the record for the debug log
+        """
+        self.done += count
+        if fields:
+            self.log('debug', 'record', **fields)
+        now = time.monotonic()
+        if self.last_drawn is None or now - self.last_drawn >= self.interval:
+            self.draw(now)
+
+    def status(self, now=None):
+        elapsed = (now or time.monotonic()) - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        percent = self.done / self.total if self.total else 1.0
+        text = f"[{self.done}/{self.total}] {percent:6.1%} {rate:6.1f}/s"
+        if rate > 0 and self.done < self.total:
+            text += f"  ETA {format_duration((self.total - self.done) / rate)}"
+        quota = get_metrics().gauge_total('omdb_key_quota_remaining')
+        if quota is not None:
+            text += f"  quota left {quota}"
+        return text
+
+    def draw(self, now=None):
+        self.last_drawn = now or time.monotonic()
+        text = self.status(now)
+        if self.in_place:
+            self.stream.write('\r' + text.ljust(79))
+            self.line_open = True
+        else:
+            self.stream.write(text + '\n')
+        self.stream.flush()
+
+    def end_line(self):
+        if self.line_open:
+            self.stream.write('\n')
+            self.line_open = False
+
+    def close(self):
+        """
+        Draw the final status and close the log
+        """
+        self.draw()
+        self.end_line()
+        self.log('info', 'finished', done=self.done, total=self.total,
+                 seconds=round(time.monotonic() - self.started, 3))
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
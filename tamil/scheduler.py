@@ -0,0 +1,138 @@
+import heapq
+from datetime import date
+
+# Fields a fully enriched record carries
+DETAIL_FIELDS = ['cast', 'director', 'poster', 'released', 'runtime', 'genre', 'writer', 'plot', 'awards']
+
+FIRST_YEAR = 1930
+
+
+def year_of(movie):
+    year = str(movie.get('year') or '')
+    return int(year) if year.isdigit() else None
+
+
+def recency(movie, context):
+    """
+    Newer movies first
+    """
+    year = year_of(movie)
+    if year is None:
+        return 0.0
+    return min(max((year - FIRST_YEAR) / (context['this_year'] - FIRST_YEAR), 0.0), 1.0)
+
+
+def missing_fields(movie, context):
+    """
+    Records missing the most detail fields first
+    """
+    return sum(1 for field in DETAIL_FIELDS if not movie.get(field)) / len(DETAIL_FIELDS)
+
+
+def rating(movie, context):
+    """
+    Better rated movies first, unrated ones last
+    """
+    try:
+        return float(movie.get('rating') or 0) / 10
+    except ValueError:
+        return 0.0
+
+
+def catalog_order(movie, context):
+    """
+    Lowest index first, the order of the catalog file
+    """
+    return 1.0 - (movie.get('index') or 0) / context['max_index']
+
+
+def newest_added(movie, context):
+    """
+    Highest index first, the most recently added entries
+    """
+    return (movie.get('index') or 0) / context['max_index']
+
+
+POLICIES = {
+    'recency': recency,
+    'missing_fields': missing_fields,
+    'rating': rating,
+    'catalog_order': catalog_order,
+    'newest_added': newest_added,
+}
+
+# The orders and subsets of the forked update scripts
+PRESETS = {
+    'newest': {'weights': {'recency': 1.0}},
+    '2025': {'weights': {'newest_added': 1.0}, 'year': 2025},
+    'recent': {'weights': {'catalog_order': 1.0}, 'min_year': 1980},
+    'sample': {'weights': {'catalog_order': 1.0}, 'budget': 50},
+    'balanced': {'weights': {'recency': 1.0, 'missing_fields': 1.0, 'rating': 0.5}},
+}
+
+
+def parse_weights(text):
+    """
+    Parse "recency=1,rating=0.5" into {'recency': 1.0, 'rating': 0.5}
+    """
+    weights = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in POLICIES:
+            raise ValueError(f"Unknown policy '{name}', choose from {', '.join(POLICIES)}")
+        weights[name] = float(weight) if weight else 1.0
+    return weights
+
+
+def needs_lookup(movie):
+    """
+    A movie is worth a request if it has a title and any detail field is
+    still empty, not just the cast
+    """
+    return bool(movie.get('title')) and not all(movie.get(field) for field in DETAIL_FIELDS)
+
+
+def schedule(movies, budget, weights, year=None, min_year=None, eligible=needs_lookup, max_index=None):
+    """
+    Pick the `budget` most valuable movies to enrich, highest score first
+    Each movie's score is the weighted sum of the policy scores; year and
+    min_year restrict the candidates. Ties go to the lower index.
+    `movies` may be a one-shot iterator if `max_index` is given.
+    """
+    if max_index is None:
+        max_index = max((movie.get('index') or 0 for movie in movies), default=0)
+    context = {
+        'this_year': date.today().year,
+        'max_index': max_index or 1,
+    }
+    policies = [(POLICIES[name], weight) for name, weight in weights.items()]
+
+    def candidates():
+        for movie in movies:
+            if not eligible(movie):
+                continue
+            movie_year = year_of(movie)
+            if year is not None and movie_year != year:
+                continue
+            if min_year is not None and (movie_year is None or movie_year < min_year):
+                continue
+            score = sum(weight * policy(movie, context) for policy, weight in policies)
+            yield (score, -(movie.get('index') or 0)), movie
+
+    # Only the top `budget` entries are kept in the heap
+    top = heapq.nlargest(budget, candidates(), key=lambda item: item[0])
+    return [movie for _, movie in top]
+
+
+def schedule_preset(movies, budget, preset, weights=None, eligible=needs_lookup, max_index=None):
+    """
+    Schedule with one of the PRESETS; a preset budget caps the given one
+    and explicit `weights` replace the preset's policies
+    """
+    options = PRESETS[preset]
+    return schedule(movies, min(budget, options.get('budget', budget)), weights or options['weights'],
+                    year=options.get('year'), min_year=options.get('min_year'),
+                    eligible=eligible, max_index=max_index)
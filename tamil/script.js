@@ -5,6 +5,7 @@ let currentSort = 'desc';
 let currentPage = 1;
 let currentYearFilter = 'all';
 let currentActorFilter = 'all';
+let actorFilms = null; // person ID -> Set of movie indexes, from the people index
 let favoriteMovies = JSON.parse(localStorage.getItem('favoriteMovies')) || [];
 const moviesPerPage = 12; // Show 12 movies per page
 
@@ -77,8 +78,31 @@ function populateYearFilter() {
     });
 }
 
-// Populate actor filter dropdown with real actor data
+// Populate actor filter dropdown from the people index (one entry per
+// canonical person, however their name is spelled in the catalog), falling
+// back to the names found in the cast lists
 function populateActorFilter() {
+    fetch('imdb_tamil_movies_with_cast.people.json')
+        .then(response => response.json())
+        .then(index => {
+            // An index built from another version of the catalog would point at the wrong movies
+            if (index.records !== moviesData.length) {
+                throw new Error('People index does not match the catalog');
+            }
+            const names = new Map(index.people.map(([id, name]) => [String(id), name]));
+            actorFilms = new Map(Object.entries(index.films.cast).map(([id, films]) => [id, new Set(films)]));
+            const actors = [...actorFilms.keys()]
+                .map(id => [id, names.get(id)])
+                .sort((a, b) => a[1].localeCompare(b[1]));
+            fillActorOptions(actors);
+        })
+        .catch(() => {
+            actorFilms = null;
+            populateActorFilterFromCast();
+        });
+}
+
+function populateActorFilterFromCast() {
     // Extract all unique actors from movies that have cast information
     const allActors = new Set();
     moviesData.forEach(movie => {
@@ -92,8 +116,11 @@ function populateActorFilter() {
     });
     
     // Convert to array and sort alphabetically
-    const actors = Array.from(allActors).sort();
-    
+    fillActorOptions(Array.from(allActors).sort().map(actor => [actor, actor]));
+}
+
+// Replace the actor options with [value, label] pairs
+function fillActorOptions(actors) {
     // Clear existing options except the first one
     const actorFilter = document.getElementById('actorFilter');
     while (actorFilter.children.length > 1) {
@@ -101,10 +128,10 @@ function populateActorFilter() {
     }
     
     // Add actors to the dropdown
-    actors.forEach(actor => {
+    actors.forEach(([value, label]) => {
         const option = document.createElement('option');
-        option.value = actor;
-        option.textContent = actor;
+        option.value = value;
+        option.textContent = label;
         actorFilter.appendChild(option);
     });
 }
@@ -145,13 +172,18 @@ function getFilteredMovies(category) {
     
     // Apply actor filter if not "all" and category is not favorites
     if (currentActorFilter !== 'all' && category !== 'favorites') {
-        // Filter movies by actor
-        filteredMovies = filteredMovies.filter(movie => {
-            if (movie.cast && Array.isArray(movie.cast)) {
-                return movie.cast.some(actor => actor && actor.includes(currentActorFilter));
-            }
-            return false;
-        });
+        // Filter movies by actor: a set lookup by person ID when the people index is loaded
+        if (actorFilms) {
+            const films = actorFilms.get(currentActorFilter) || new Set();
+            filteredMovies = filteredMovies.filter(movie => films.has(movie.index));
+        } else {
+            filteredMovies = filteredMovies.filter(movie => {
+                if (movie.cast && Array.isArray(movie.cast)) {
+                    return movie.cast.some(actor => actor && actor.includes(currentActorFilter));
+                }
+                return false;
+            });
+        }
     }
     
     return filteredMovies;
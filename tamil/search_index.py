@@ -0,0 +1,137 @@
+import argparse
+import bisect
+import json
+import os
+import re
+
+from catalog_stream import atomic_write_bytes, iter_catalog
+
+# Runs of letters and digits; the pages tokenize queries with the same rule
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def split_genres(genre):
+    return [g.strip() for g in (genre or '').split(',') if g.strip()]
+
+
+def movie_tokens(movie):
+    """
+    Every token of the searchable fields: title, cast, director and genre
+    """
+    tokens = set(tokenize(movie.get('title')))
+    for actor in movie.get('cast') or []:
+        tokens.update(tokenize(actor))
+    tokens.update(tokenize(movie.get('director')))
+    tokens.update(tokenize(movie.get('genre')))
+    return tokens
+
+
+def encode_postings(indexes):
+    """
+    Sorted indexes as gaps from the previous one, which keeps the JSON small
+    """
+    previous = 0
+    gaps = []
+    for index in indexes:
+        gaps.append(index - previous)
+        previous = index
+    return gaps
+
+
+def decode_postings(gaps):
+    indexes = []
+    previous = 0
+    for gap in gaps:
+        previous += gap
+        indexes.append(previous)
+    return indexes
+
+
+def build_search_index(movies):
+    """
+    Inverted index of the catalog
+    'tokens' is a list of [token, postings] sorted by token, so a prefix is a
+    contiguous range found by binary search; 'genres' maps each genre name to
+    its postings. Postings are gap encoded lists of movie `index` values.
+    """
+    tokens = {}
+    genres = {}
+    records = 0
+    for movie in movies:
+        records += 1
+        index = movie.get('index')
+        if index is None:
+            continue
+        for token in movie_tokens(movie):
+            tokens.setdefault(token, []).append(index)
+        for genre in split_genres(movie.get('genre')):
+            genres.setdefault(genre, []).append(index)
+
+    return {
+        'version': 1,
+        'records': records,
+        'tokens': [[token, encode_postings(sorted(set(tokens[token])))] for token in sorted(tokens)],
+        'genres': [[genre, encode_postings(sorted(set(genres[genre])))] for genre in sorted(genres)]
+    }
+
+
+def search(index, query, genre=None):
+    """
+    Indexes of the movies matching every query term as a token prefix, and the genre
+    Mirrors the search in tamil2/script.js
+    """
+    words = [token for token, _ in index['tokens']]
+    result = None
+    for term in tokenize(query):
+        matches = set()
+        position = bisect.bisect_left(words, term)
+        while position < len(words) and words[position].startswith(term):
+            matches.update(decode_postings(index['tokens'][position][1]))
+            position += 1
+        result = matches if result is None else result & matches
+    if genre:
+        matches = set()
+        for name, gaps in index['genres']:
+            if name == genre:
+                matches = set(decode_postings(gaps))
+        result = matches if result is None else result & matches
+    return sorted(result or [])
+
+
+def search_index_path_for(catalog_file, out_dir=None):
+    out_dir = out_dir or os.path.dirname(os.path.abspath(catalog_file))
+    stem = os.path.splitext(os.path.basename(catalog_file))[0]
+    return os.path.join(out_dir, stem + ".search.json")
+
+
+def write_search_index(catalog_file, out_dir=None, movies=None):
+    """
+    Build the index of `catalog_file` (or of `movies` when already loaded) into <stem>.search.json
+    """
+    index = build_search_index(movies if movies is not None else iter_catalog(catalog_file))
+    path = search_index_path_for(catalog_file, out_dir)
+    atomic_write_bytes(path, json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    print(f"Search index: {len(index['tokens'])} tokens, {len(index['genres'])} genres, "
+          f"{os.path.getsize(path)} bytes in {path}")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the inverted search index used by the catalog pages")
+    parser.add_argument("catalog", nargs="?", default="imdb_tamil_movies_with_cast.json")
+    parser.add_argument("--out-dir", help="Directory to write into (defaults to the catalog's directory)")
+    parser.add_argument("--query", help="Search the freshly built index and print the matches")
+    args = parser.parse_args()
+
+    path = write_search_index(args.catalog, args.out_dir)
+    if args.query is not None:
+        with open(path, 'r', encoding='utf-8') as f:
+            matches = search(json.load(f), args.query)
+        titles = {movie.get('index'): movie.get('title') for movie in iter_catalog(args.catalog)}
+        print(f"{len(matches)} matches for '{args.query}'")
+        for index in matches[:20]:
+            print(f"  {index}: {titles.get(index)}")
@@ -1,67 +1,26 @@
+import argparse
 import json
-import requests
 import time
-from urllib.parse import quote_plus
 
-def fetch_movie_details(movie_title, movie_year=None):
-    """
-    Fetch cast, director, and poster information for a movie using OMDB API
-    """
-    # Using your provided API key
-    api_key = "b5c868a4"
-    
-    # Construct the API URL with additional parameters to get more details
-    if movie_year:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&y={movie_year}&apikey={api_key}&plot=short"
-    else:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&apikey={api_key}&plot=short"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                # Extract cast information
-                cast = data.get('Actors', '')
-                cast_list = []
-                if cast and cast != 'N/A':
-                    # Split cast into a list
-                    cast_list = [actor.strip() for actor in cast.split(',')]
-                
-                # Extract director information
-                director = data.get('Director', '')
-                if director == 'N/A':
-                    director = ''
-                
-                # Extract poster image link
-                poster = data.get('Poster', '')
-                if poster == 'N/A':
-                    poster = ''
-                
-                return {
-                    'cast': cast_list,
-                    'director': director,
-                    'poster': poster
-                }
-        # Check if we hit the API limit
-        elif response.status_code == 429:
-            print("API limit reached. Please try again later.")
-            return None
-        return {'cast': [], 'director': '', 'poster': ''}
-    except Exception as e:
-        print(f"Error fetching data for {movie_title}: {e}")
-        return {'cast': [], 'director': '', 'poster': ''}
+from checkpoint_journal import open_journal
+from metrics import export_run_metrics
+from movie_store import MovieStore
+from omdb_cache import get_default_cache, lookup_key
+from omdb_client import ERROR, HIT, THROTTLED, lookup_movie_details
 
-def update_2025_movies_with_details(input_file, output_file, delay=1, max_requests=1000):
+# Using your provided API key
+API_KEY = "b5c868a4"
+
+def update_2025_movies_with_details(input_file, output_file, delay=1, max_requests=1000, resume=False):
     """
     Update movies JSON file with cast, director, and poster information
     Focuses on movies from 2025, in descending order
     Limits requests to avoid API limits
+    Every lookup is journaled as it completes, resume=True continues an interrupted run
     """
     # Load the existing movies data
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            movies = json.load(f)
+        store = MovieStore.load(input_file)
     except FileNotFoundError:
         print(f"Error: File {input_file} not found.")
         return
@@ -69,57 +28,63 @@ def update_2025_movies_with_details(input_file, output_file, delay=1, max_reques
         print(f"Error: Invalid JSON in file {input_file}.")
         return
     
-    # Filter for 2025 movies only
-    movies_2025 = [movie for movie in movies if movie.get('year') == '2025']
+    # Look up the 2025 movies in the year index
+    movies_2025 = store.with_year('2025')
     
     # Sort in descending order by index (or any other relevant field)
     movies_2025.sort(key=lambda x: x.get('index', 0), reverse=True)
     
-    print(f"Loaded {len(movies)} total movies from {input_file}")
+    print(f"Loaded {len(store)} total movies from {input_file}")
     print(f"Found {len(movies_2025)} movies from 2025")
     print(f"Will process up to {max_requests} movies to stay within API limits")
     
-    # Process 2025 movies
-    updated_movies = []
-    requests_made = 0
+    # Replay lookups journaled by an interrupted run
+    journal, completed = open_journal(output_file, resume)
+    for movie in movies_2025:
+        if movie.get('index') in completed:
+            movie.update(completed[movie['index']])
     
-    # First, add all non-2025 movies to the result
-    non_2025_movies = [movie for movie in movies if movie not in movies_2025]
-    updated_movies.extend(non_2025_movies)
+    # Process 2025 movies, records are updated in place in the store
+    requests_made = 0
+    # Titles OMDB recently could not resolve are passed over without spending the request budget
+    known_misses = get_default_cache().known_miss_keys()
     
-    # Process 2025 movies
     for i, movie in enumerate(movies_2025):
         if requests_made >= max_requests:
             print(f"Reached API limit of {max_requests} requests. Stopping to avoid rate limiting.")
-            # Add the remaining 2025 movies without updating them
-            updated_movies.extend(movies_2025[i:])
             break
             
         print(f"Processing {i+1}/{len(movies_2025)}: {movie.get('title', 'Unknown Title')} ({movie.get('year', 'Unknown Year')})")
         
+        # Skip movies already looked up before the run was interrupted
+        if movie.get('index') in completed:
+            print(f"  Looked up before the run was interrupted, skipping...")
+            continue
+        
         # Skip if cast already exists
         if 'cast' in movie and movie['cast'] and len(movie['cast']) > 0:
             print(f"  Details already exist, skipping...")
-            updated_movies.append(movie)
             continue
         
         # Fetch movie details
         title = movie.get('title', '')
         year = movie.get('year', '')
         
+        if title and lookup_key(title, year) in known_misses:
+            print(f"  Not found on OMDB recently, skipping until its re-check...")
+            continue
+        
+        requested = False
         if title:
-            details = fetch_movie_details(title, year)
+            details, result = lookup_movie_details(title, year, api_key=API_KEY, plot='short')
             # Check if we hit API limit
-            if details is None:
+            if result.status == THROTTLED:
                 print("API limit reached. Saving progress and stopping.")
-                # Add the remaining 2025 movies without updating them
-                updated_movies.extend(movies_2025[i:])
                 break
-                
-            if details:
-                movie['cast'] = details['cast']
-                movie['director'] = details['director']
-                movie['poster'] = details['poster']
+            
+            if result.status == HIT:
+                # Every field of the response, not just cast, director and poster
+                movie.update(details)
                 
                 if details['cast']:
                     print(f"  Found {len(details['cast'])} cast members: {', '.join(details['cast'][:3])}{'...' if len(details['cast']) > 3 else ''}")
@@ -127,43 +92,55 @@ def update_2025_movies_with_details(input_file, output_file, delay=1, max_reques
                     print(f"  Director: {details['director']}")
                 if details['poster']:
                     print(f"  Poster: {details['poster']}")
+            elif result.status == ERROR:
+                print(f"  Lookup failed, the movie is tried again next run")
             else:
                 print(f"  No information found")
-                movie['cast'] = []
-                movie['director'] = ''
-                movie['poster'] = ''
+                details = {'cast': [], 'director': '', 'poster': ''}
+                movie.update(details)
+            
+            # An error says nothing about the movie, so it is not journaled
+            if result.status != ERROR:
+                journal.record(movie.get('index'), details)
                 
-            requests_made += 1
+            # Answers from the response cache cost no request and need no delay
+            requested = not result.from_cache
+            if requested:
+                requests_made += 1
         else:
             print(f"  No title found, skipping...")
             movie['cast'] = []
             movie['director'] = ''
             movie['poster'] = ''
         
-        updated_movies.append(movie)
-        
         # Add delay to avoid overwhelming the API
-        if i < len(movies_2025) - 1 and requests_made < max_requests:  # Don't delay after the last item
+        if requested and i < len(movies_2025) - 1 and requests_made < max_requests:  # Don't delay after the last item
             time.sleep(delay)
     
-    # Sort all movies by index to maintain original order
-    updated_movies.sort(key=lambda x: x.get('index', 0))
+    journal.close()
     
     # Save the updated data
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_movies, f, indent=2, ensure_ascii=False)
+        store.save(output_file)
         print(f"\nUpdated movies data saved to {output_file}")
-        print(f"Successfully processed {len([m for m in updated_movies if m.get('year') == '2025'])} movies from 2025")
+        print(f"Successfully processed {len(movies_2025)} movies from 2025")
         print(f"Made {requests_made} API requests")
+        # Everything is in the output file now, the journal is no longer needed
+        journal.clear()
     except Exception as e:
         print(f"Error saving file: {e}")
+        print(f"Completed lookups are kept in {journal.path}, rerun with --resume to continue")
 
 # Run the update
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch details for the 2025 movies")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its journal")
+    args = parser.parse_args()
+
     print("Starting Tamil Movies Update for 2025...")
     print("Using API Key: b5c868a4")
     print("Focusing on movies from 2025 in descending order")
     print("Limited to 1000 requests")
     print("=" * 50)
-    update_2025_movies_with_details("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
\ No newline at end of file
+    update_2025_movies_with_details("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json", resume=args.resume)
+    export_run_metrics('update_2025_movies')
\ No newline at end of file
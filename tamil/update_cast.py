@@ -1,37 +1,12 @@
 import json
-import requests
 import time
-from urllib.parse import quote_plus
 
-def fetch_movie_cast(movie_title, movie_year=None):
-    """
-    Fetch cast information for a movie using OMDB API
-    Note: You'll need to get a free API key from http://www.omdbapi.com/
-    """
-    # Replace 'YOUR_API_KEY' with your actual OMDB API key
-    api_key = "YOUR_API_KEY"
-    
-    # Construct the API URL
-    if movie_year:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&y={movie_year}&apikey={api_key}"
-    else:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&apikey={api_key}"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                # Extract cast information
-                cast = data.get('Actors', '')
-                if cast:
-                    # Split cast into a list
-                    cast_list = [actor.strip() for actor in cast.split(',')]
-                    return cast_list
-        return []
-    except Exception as e:
-        print(f"Error fetching data for {movie_title}: {e}")
-        return []
+from catalog_stream import save_catalog
+from omdb_cache import lookup_key
+from omdb_client import fetch_movie_cast
+
+# Replace 'YOUR_API_KEY' with your actual OMDB API key
+API_KEY = "YOUR_API_KEY"
 
 def update_movies_with_cast(input_file, output_file, delay=1):
     """
@@ -57,6 +32,8 @@ def update_movies_with_cast(input_file, output_file, delay=1):
     
     # Process each movie
     updated_movies = []
+    # Cast found in this run by lookup key, so each distinct title and year is requested once
+    resolved = {}
     for i, movie in enumerate(movies):
         print(f"Processing {i+1}/{len(movies)}: {movie.get('title', 'Unknown Title')}")
         
@@ -70,8 +47,16 @@ def update_movies_with_cast(input_file, output_file, delay=1):
         title = movie.get('title', '')
         year = movie.get('year', '')
         
+        # Same title and year as a movie already looked up in this run
+        if title and lookup_key(title, year) in resolved:
+            movie['cast'] = resolved[lookup_key(title, year)]
+            print(f"  Same lookup as an earlier movie, reusing its cast")
+            updated_movies.append(movie)
+            continue
+        
         if title:
-            cast = fetch_movie_cast(title, year)
+            cast = fetch_movie_cast(title, year, api_key=API_KEY)
+            resolved[lookup_key(title, year)] = cast or []
             if cast:
                 movie['cast'] = cast
                 print(f"  Found {len(cast)} cast members")
@@ -90,8 +75,7 @@ def update_movies_with_cast(input_file, output_file, delay=1):
     
     # Save the updated data
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_movies, f, indent=2, ensure_ascii=False)
+        save_catalog(output_file, updated_movies)
         print(f"\nUpdated movies data saved to {output_file}")
     except Exception as e:
         print(f"Error saving file: {e}")
@@ -1,40 +1,13 @@
 import json
-import requests
 import time
-from urllib.parse import quote_plus
 
-def fetch_movie_cast(movie_title, movie_year=None):
-    """
-    Fetch cast information for a movie using OMDB API
-    """
-    # Using your provided API key
-    api_key = "b5c868a4"
-    
-    # Construct the API URL
-    if movie_year:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&y={movie_year}&apikey={api_key}"
-    else:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&apikey={api_key}"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                # Extract cast information
-                cast = data.get('Actors', '')
-                if cast:
-                    # Split cast into a list
-                    cast_list = [actor.strip() for actor in cast.split(',')]
-                    return cast_list
-        # Check if we hit the API limit
-        elif response.status_code == 429:
-            print("API limit reached. Please try again later.")
-            return None
-        return []
-    except Exception as e:
-        print(f"Error fetching data for {movie_title}: {e}")
-        return []
+from catalog_stream import save_catalog
+from metrics import export_run_metrics
+from omdb_cache import get_default_cache, lookup_key
+from omdb_client import ERROR, THROTTLED, lookup_movie_cast
+
+# Using your provided API key
+API_KEY = "b5c868a4"
 
 def update_movies_with_cast(input_file, output_file, delay=1, max_requests=900):
     """
@@ -58,6 +31,10 @@ def update_movies_with_cast(input_file, output_file, delay=1, max_requests=900):
     # Process each movie
     updated_movies = []
     requests_made = 0
+    # Cast found in this run by lookup key, so each distinct title and year is requested once
+    resolved = {}
+    # Titles OMDB recently could not resolve are passed over without spending the request budget
+    known_misses = get_default_cache().known_miss_keys()
     
     for i, movie in enumerate(movies):
         if requests_made >= max_requests:
@@ -78,23 +55,45 @@ def update_movies_with_cast(input_file, output_file, delay=1, max_requests=900):
         title = movie.get('title', '')
         year = movie.get('year', '')
         
+        if title and lookup_key(title, year) in known_misses:
+            print(f"  Not found on OMDB recently, skipping until its re-check...")
+            updated_movies.append(movie)
+            continue
+        
+        # Same title and year as a movie already looked up in this run
+        if title and lookup_key(title, year) in resolved:
+            movie['cast'] = resolved[lookup_key(title, year)]
+            print(f"  Same lookup as an earlier movie, reusing its cast")
+            updated_movies.append(movie)
+            continue
+        
+        requested = False
         if title:
-            cast = fetch_movie_cast(title, year)
+            cast, result = lookup_movie_cast(title, year, api_key=API_KEY)
             # Check if we hit API limit
-            if cast is None:
+            if result.status == THROTTLED:
                 print("API limit reached. Saving progress and stopping.")
                 # Add the remaining movies without updating them
                 updated_movies.extend(movies[i:])
                 break
                 
-            if cast:
+            if result.status == ERROR:
+                print(f"  Lookup failed, the movie is tried again next run")
+            elif cast:
                 movie['cast'] = cast
                 print(f"  Found {len(cast)} cast members: {', '.join(cast[:3])}{'...' if len(cast) > 3 else ''}")
             else:
                 print(f"  No cast information found")
                 movie['cast'] = []
+            
+            # An error says nothing about the movie: it is not reused, so it is tried again
+            if result.status != ERROR:
+                resolved[lookup_key(title, year)] = cast
                 
-            requests_made += 1
+            # Answers from the response cache cost no request and need no delay
+            requested = not result.from_cache
+            if requested:
+                requests_made += 1
         else:
             print(f"  No title found, skipping...")
             movie['cast'] = []
@@ -102,13 +101,12 @@ def update_movies_with_cast(input_file, output_file, delay=1, max_requests=900):
         updated_movies.append(movie)
         
         # Add delay to avoid overwhelming the API
-        if i < len(movies) - 1 and requests_made < max_requests:  # Don't delay after the last item
+        if requested and i < len(movies) - 1 and requests_made < max_requests:  # Don't delay after the last item
             time.sleep(delay)
     
     # Save the updated data
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_movies, f, indent=2, ensure_ascii=False)
+        save_catalog(output_file, updated_movies)
         print(f"\nUpdated movies data saved to {output_file}")
         print(f"Successfully processed {len(updated_movies)} movies")
         print(f"Made {requests_made} API requests")
@@ -121,4 +119,5 @@ if __name__ == "__main__":
     print("Using API Key: b5c868a4")
     print("Limited to 900 requests to stay within free API limits")
     print("=" * 50)
-    update_movies_with_cast("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
\ No newline at end of file
+    update_movies_with_cast("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
+    export_run_metrics('update_cast_limited')
\ No newline at end of file
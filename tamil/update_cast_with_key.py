@@ -1,36 +1,13 @@
 import json
-import requests
 import time
-from urllib.parse import quote_plus
 
-def fetch_movie_cast(movie_title, movie_year=None):
-    """
-    Fetch cast information for a movie using OMDB API
-    """
-    # Using your provided API key
-    api_key = "b5c868a4"
-    
-    # Construct the API URL
-    if movie_year:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&y={movie_year}&apikey={api_key}"
-    else:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&apikey={api_key}"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                # Extract cast information
-                cast = data.get('Actors', '')
-                if cast:
-                    # Split cast into a list
-                    cast_list = [actor.strip() for actor in cast.split(',')]
-                    return cast_list
-        return []
-    except Exception as e:
-        print(f"Error fetching data for {movie_title}: {e}")
-        return []
+from catalog_stream import save_catalog
+from metrics import export_run_metrics
+from omdb_cache import lookup_key
+from omdb_client import fetch_movie_cast
+
+# Using your provided API key
+API_KEY = "b5c868a4"
 
 def update_movies_with_cast(input_file, output_file, delay=1):
     """
@@ -51,6 +28,8 @@ def update_movies_with_cast(input_file, output_file, delay=1):
     
     # Process each movie
     updated_movies = []
+    # Cast found in this run by lookup key, so each distinct title and year is requested once
+    resolved = {}
     for i, movie in enumerate(movies):
         print(f"Processing {i+1}/{len(movies)}: {movie.get('title', 'Unknown Title')}")
         
@@ -64,8 +43,16 @@ def update_movies_with_cast(input_file, output_file, delay=1):
         title = movie.get('title', '')
         year = movie.get('year', '')
         
+        # Same title and year as a movie already looked up in this run
+        if title and lookup_key(title, year) in resolved:
+            movie['cast'] = resolved[lookup_key(title, year)]
+            print(f"  Same lookup as an earlier movie, reusing its cast")
+            updated_movies.append(movie)
+            continue
+        
         if title:
-            cast = fetch_movie_cast(title, year)
+            cast = fetch_movie_cast(title, year, api_key=API_KEY)
+            resolved[lookup_key(title, year)] = cast or []
             if cast:
                 movie['cast'] = cast
                 print(f"  Found {len(cast)} cast members: {', '.join(cast[:3])}{'...' if len(cast) > 3 else ''}")
@@ -84,8 +71,7 @@ def update_movies_with_cast(input_file, output_file, delay=1):
     
     # Save the updated data
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_movies, f, indent=2, ensure_ascii=False)
+        save_catalog(output_file, updated_movies)
         print(f"\nUpdated movies data saved to {output_file}")
         print(f"Successfully processed {len(updated_movies)} movies")
     except Exception as e:
@@ -96,4 +82,5 @@ if __name__ == "__main__":
     print("Starting Tamil Movies Cast Update...")
     print("Using API Key: b5c868a4")
     print("=" * 40)
-    update_movies_with_cast("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
\ No newline at end of file
+    update_movies_with_cast("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
+    export_run_metrics('update_cast_with_key')
\ No newline at end of file
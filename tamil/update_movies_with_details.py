@@ -1,75 +1,45 @@
+import argparse
 import json
-import requests
 import time
-from urllib.parse import quote_plus
+
+import omdb_client
+from catalog_stream import save_catalog
+from checkpoint_journal import open_journal
+from metrics import export_run_metrics
+from omdb_cache import get_default_cache, lookup_key
+from poster_stage import resolve_posters
+from progress import LEVELS, ProgressReporter
+
+# Using your provided API key
+API_KEY = "1916b9ca"
+
+def lookup_movie_details(movie_title, movie_year=None, cache_only=False):
+    """
+    fetch_movie_details plus the LookupResult, (details, result)
+    """
+    return omdb_client.lookup_movie_details(movie_title, movie_year, api_key=API_KEY, cache_only=cache_only,
+                                            plot='short', type='movie')
 
 def fetch_movie_details(movie_title, movie_year=None):
     """
     Fetch cast, director, and poster information for a movie using OMDB API
+    The poster is kept as OMDB gives it, resolve_posters upgrades it once
+    the higher quality image is known to exist
     """
-    # Using your provided API key
-    api_key = "1916b9ca"
-    
-    # Construct the API URL with additional parameters to get more details
-    # Adding higher quality poster request
-    if movie_year:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&y={movie_year}&apikey={api_key}&plot=short&type=movie"
-    else:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&apikey={api_key}&plot=short&type=movie"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                # Extract cast information
-                cast = data.get('Actors', '')
-                cast_list = []
-                if cast and cast != 'N/A':
-                    # Split cast into a list
-                    cast_list = [actor.strip() for actor in cast.split(',')]
-                
-                # Extract director information
-                director = data.get('Director', '')
-                if director == 'N/A':
-                    director = ''
-                
-                # Extract poster image link
-                poster = data.get('Poster', '')
-                if poster == 'N/A':
-                    poster = ''
-                else:
-                    # Try to get a higher resolution version of the poster
-                    # OMDB API returns a lower resolution image by default
-                    # We can try to get a higher resolution by modifying the URL
-                    if poster and '_V1_' in poster:
-                        # Try to get a higher resolution version
-                        # Replace SX300/SY300 with higher values for better quality
-                        poster = poster.replace('SX300', 'SX600').replace('SY300', 'SY900')
-                        # Also try other common size patterns
-                        poster = poster.replace('SX200', 'SX600').replace('SY200', 'SY900')
-                        poster = poster.replace('SX150', 'SX600').replace('SY150', 'SY900')
-                        poster = poster.replace('SX100', 'SX600').replace('SY100', 'SY900')
-                
-                return {
-                    'cast': cast_list,
-                    'director': director,
-                    'poster': poster
-                }
-        # Check if we hit the API limit
-        elif response.status_code == 429:
-            print("API limit reached. Please try again later.")
-            return None
-        return {'cast': [], 'director': '', 'poster': ''}
-    except Exception as e:
-        print(f"Error fetching data for {movie_title}: {e}")
-        return {'cast': [], 'director': '', 'poster': ''}
+    return omdb_client.fetch_movie_details(movie_title, movie_year, api_key=API_KEY,
+                                           plot='short', type='movie')
 
-def update_movies_with_details(input_file, output_file, delay=1, max_requests=1000):
+def update_movies_with_details(input_file, output_file, delay=1, max_requests=1000, resume=False,
+                               progress_interval=2.0, log_file=None, log_level='info', check_posters=True):
     """
     Update movies JSON file with cast, director, and poster information
     Processes movies in descending order by year
     Limits requests to avoid API limits
+    Every lookup is journaled as it completes, resume=True continues an interrupted run
+    Progress is a status line redrawn every `progress_interval` seconds, per-movie
+    details go to the JSON-lines `log_file` at log_level='debug'
+    With check_posters, the posters found in this run are upscaled where the
+    larger image exists (concurrent HEAD requests, see poster_stage)
     """
     # Load the existing movies data
     try:
@@ -88,83 +58,147 @@ def update_movies_with_details(input_file, output_file, delay=1, max_requests=10
     print(f"Loaded {len(movies)} movies from {input_file}")
     print(f"Will process up to {max_requests} movies to stay within API limits")
     
+    # Replay lookups journaled by an interrupted run
+    journal, completed = open_journal(output_file, resume)
+    # Movies that got a poster from OMDB in this run, replayed ones included
+    new_posters = []
+    for movie in movies:
+        if movie.get('index') in completed:
+            movie.update(completed[movie['index']])
+            new_posters.append(movie)
+    
     # Process movies
     updated_movies = []
     requests_made = 0
+    # Details found in this run by lookup key, so each distinct title and year is requested once
+    resolved = {}
+    # Titles OMDB recently could not resolve are passed over without spending the request budget
+    known_misses = get_default_cache().known_miss_keys()
+    progress = ProgressReporter(len(movies), progress_interval, log_file, log_level)
     
     for i, movie in enumerate(movies):
         if requests_made >= max_requests:
-            print(f"Reached API limit of {max_requests} requests. Stopping to avoid rate limiting.")
+            progress.message(f"Reached API limit of {max_requests} requests. Stopping to avoid rate limiting.")
             # Add the remaining movies without updating them
             updated_movies.extend(movies[i:])
             break
-            
-        print(f"Processing {i+1}/{len(movies)}: {movie.get('title', 'Unknown Title')} ({movie.get('year', 'Unknown Year')})")
+        
+        title = movie.get('title', '')
+        year = movie.get('year', '')
+        record = {'index': movie.get('index'), 'title': title, 'year': year}
+        
+        # Skip movies already looked up before the run was interrupted
+        if movie.get('index') in completed:
+            updated_movies.append(movie)
+            progress.advance(outcome='journaled', **record)
+            continue
         
         # Skip if cast already exists
         if 'cast' in movie and movie['cast'] and len(movie['cast']) > 0:
-            print(f"  Details already exist, skipping...")
             updated_movies.append(movie)
+            progress.advance(outcome='has_details', **record)
             continue
         
-        # Fetch movie details
-        title = movie.get('title', '')
-        year = movie.get('year', '')
+        # OMDB could not resolve this title recently, it is re-checked once its interval expires
+        if title and lookup_key(title, year) in known_misses:
+            updated_movies.append(movie)
+            progress.advance(outcome='known_miss', **record)
+            continue
+        
+        # Same title and year as a movie already looked up in this run
+        if title and lookup_key(title, year) in resolved:
+            details = resolved[lookup_key(title, year)]
+            journal.record(movie.get('index'), details)
+            movie.update(details)
+            updated_movies.append(movie)
+            new_posters.append(movie)
+            progress.advance(outcome='reused', **record)
+            continue
         
+        requested = False
+        # Fetch movie details
         if title:
-            details = fetch_movie_details(title, year)
+            details, result = lookup_movie_details(title, year)
             # Check if we hit API limit
-            if details is None:
-                print("API limit reached. Saving progress and stopping.")
+            if result.status == omdb_client.THROTTLED:
+                progress.message("API limit reached. Saving progress and stopping.", level='warning')
                 # Add the remaining movies without updating them
                 updated_movies.extend(movies[i:])
                 break
-                
-            if details:
-                movie['cast'] = details['cast']
-                movie['director'] = details['director']
-                movie['poster'] = details['poster']
-                
-                if details['cast']:
-                    print(f"  Found {len(details['cast'])} cast members: {', '.join(details['cast'][:3])}{'...' if len(details['cast']) > 3 else ''}")
-                if details['director']:
-                    print(f"  Director: {details['director']}")
-                if details['poster']:
-                    print(f"  Poster: {details['poster']}")
+            
+            if result.status == omdb_client.HIT:
+                # Every field of the response, not just cast, director and poster
+                movie.update(details)
+                new_posters.append(movie)
+                progress.advance(outcome='found' if details['cast'] else 'no_cast', cast=details['cast'],
+                                 director=details['director'], poster=details['poster'], **record)
+            elif result.status == omdb_client.MISS:
+                details = {'cast': [], 'director': '', 'poster': ''}
+                movie.update(details)
+                progress.advance(outcome='not_found', **record)
             else:
-                print(f"  No information found")
-                movie['cast'] = []
-                movie['director'] = ''
-                movie['poster'] = ''
+                progress.advance(outcome='error', error=result.error, **record)
+            
+            # An error says nothing about the movie: it is not journaled or reused, so it is tried again
+            if result.status != omdb_client.ERROR:
+                journal.record(movie.get('index'), details)
+                resolved[lookup_key(title, year)] = details
                 
-            requests_made += 1
+            # Answers from the response cache cost no request and need no delay
+            requested = not result.from_cache
+            if requested:
+                requests_made += 1
         else:
-            print(f"  No title found, skipping...")
             movie['cast'] = []
             movie['director'] = ''
             movie['poster'] = ''
+            progress.advance(outcome='no_title', **record)
         
         updated_movies.append(movie)
         
         # Add delay to avoid overwhelming the API
-        if i < len(movies) - 1 and requests_made < max_requests:  # Don't delay after the last item
+        if requested and i < len(movies) - 1 and requests_made < max_requests:  # Don't delay after the last item
             time.sleep(delay)
     
+    progress.close()
+    journal.close()
+    
+    if check_posters:
+        posters = resolve_posters([movie for movie in new_posters if movie.get('poster')])
+        print(f"Posters: {posters['hires']} upscaled, {posters['original']} kept at original size, "
+              f"{posters['missing']} missing")
+    
     # Save the updated data
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_movies, f, indent=2, ensure_ascii=False)
+        save_catalog(output_file, updated_movies)
         print(f"\nUpdated movies data saved to {output_file}")
         print(f"Successfully processed {requests_made} movies")
         print(f"Made {requests_made} API requests")
+        # Everything is in the output file now, the journal is no longer needed
+        journal.clear()
     except Exception as e:
         print(f"Error saving file: {e}")
+        print(f"Completed lookups are kept in {journal.path}, rerun with --resume to continue")
 
 # Run the update
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch cast, director and poster details")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its journal")
+    parser.add_argument("--progress-interval", type=float, default=2.0,
+                        help="Seconds between status line updates")
+    parser.add_argument("--log-file", help="Write a JSON-lines log of the run to this file")
+    parser.add_argument("--log-level", choices=sorted(LEVELS, key=LEVELS.get), default="info",
+                        help="Lowest level written to the log, debug includes every movie")
+    parser.add_argument("--no-poster-check", action="store_true",
+                        help="Keep posters as OMDB returns them instead of checking for larger ones")
+    args = parser.parse_args()
+
     print("Starting Tamil Movies Update...")
     print("Using API Key: 1916b9ca")
     print("Processing movies in descending order by year")
     print("Limited to 1000 requests")
     print("=" * 50)
-    update_movies_with_details("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
\ No newline at end of file
+    update_movies_with_details("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json", resume=args.resume,
+                               progress_interval=args.progress_interval, log_file=args.log_file,
+                               log_level=args.log_level, check_posters=not args.no_poster_check)
+    export_run_metrics('update_movies_with_details')
\ No newline at end of file
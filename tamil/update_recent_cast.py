@@ -1,40 +1,13 @@
 import json
-import requests
 import time
-from urllib.parse import quote_plus
 
-def fetch_movie_cast(movie_title, movie_year=None):
-    """
-    Fetch cast information for a movie using OMDB API
-    """
-    # Using your provided API key
-    api_key = "b5c868a4"
-    
-    # Construct the API URL
-    if movie_year:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&y={movie_year}&apikey={api_key}"
-    else:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&apikey={api_key}"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                # Extract cast information
-                cast = data.get('Actors', '')
-                if cast:
-                    # Split cast into a list
-                    cast_list = [actor.strip() for actor in cast.split(',')]
-                    return cast_list
-        # Check if we hit the API limit
-        elif response.status_code == 429:
-            print("API limit reached. Please try again later.")
-            return None
-        return []
-    except Exception as e:
-        print(f"Error fetching data for {movie_title}: {e}")
-        return []
+from metrics import export_run_metrics
+from movie_store import MovieStore
+from omdb_cache import get_default_cache, lookup_key
+from omdb_client import ERROR, THROTTLED, lookup_movie_cast
+
+# Using your provided API key
+API_KEY = "b5c868a4"
 
 def update_recent_movies_with_cast(input_file, output_file, delay=1, max_requests=900, min_year=1980):
     """
@@ -43,8 +16,7 @@ def update_recent_movies_with_cast(input_file, output_file, delay=1, max_request
     """
     # Load the existing movies data
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            movies = json.load(f)
+        store = MovieStore.load(input_file)
     except FileNotFoundError:
         print(f"Error: File {input_file} not found.")
         return
@@ -52,23 +24,21 @@ def update_recent_movies_with_cast(input_file, output_file, delay=1, max_request
         print(f"Error: Invalid JSON in file {input_file}.")
         return
     
-    # Filter for recent movies (after min_year)
-    recent_movies = [movie for movie in movies if movie.get('year') and movie.get('year').isdigit() and int(movie.get('year')) >= min_year]
-    other_movies = [movie for movie in movies if movie not in recent_movies]
+    # Select recent movies (after min_year) through the year index
+    recent_movies = store.from_year(min_year)
     
-    print(f"Loaded {len(movies)} total movies from {input_file}")
+    print(f"Loaded {len(store)} total movies from {input_file}")
     print(f"Found {len(recent_movies)} movies from {min_year} onwards")
     print(f"Will process up to {max_requests} recent movies to stay within API limits")
     
-    # Process recent movies first
-    updated_movies = []
+    # Process recent movies, records are updated in place in the store
     requests_made = 0
+    # Titles OMDB recently could not resolve are passed over without spending the request budget
+    known_misses = get_default_cache().known_miss_keys()
     
     for i, movie in enumerate(recent_movies):
         if requests_made >= max_requests:
             print(f"Reached API limit of {max_requests} requests. Stopping to avoid rate limiting.")
-            # Add the remaining recent movies without updating them
-            updated_movies.extend(recent_movies[i:])
             break
             
         print(f"Processing {i+1}/{len(recent_movies)}: {movie.get('title', 'Unknown Title')} ({movie.get('year', 'Unknown Year')})")
@@ -76,52 +46,50 @@ def update_recent_movies_with_cast(input_file, output_file, delay=1, max_request
         # Skip if cast already exists
         if 'cast' in movie and movie['cast']:
             print(f"  Cast already exists, skipping...")
-            updated_movies.append(movie)
             continue
         
         # Fetch cast information
         title = movie.get('title', '')
         year = movie.get('year', '')
         
+        if title and lookup_key(title, year) in known_misses:
+            print(f"  Not found on OMDB recently, skipping until its re-check...")
+            continue
+        
+        requested = False
         if title:
-            cast = fetch_movie_cast(title, year)
+            cast, result = lookup_movie_cast(title, year, api_key=API_KEY)
             # Check if we hit API limit
-            if cast is None:
+            if result.status == THROTTLED:
                 print("API limit reached. Saving progress and stopping.")
-                # Add the remaining recent movies without updating them
-                updated_movies.extend(recent_movies[i:])
                 break
                 
-            if cast:
+            if result.status == ERROR:
+                print(f"  Lookup failed, the movie is tried again next run")
+            elif cast:
                 movie['cast'] = cast
                 print(f"  Found {len(cast)} cast members: {', '.join(cast[:3])}{'...' if len(cast) > 3 else ''}")
             else:
                 print(f"  No cast information found")
                 movie['cast'] = []
                 
-            requests_made += 1
+            # Answers from the response cache cost no request and need no delay
+            requested = not result.from_cache
+            if requested:
+                requests_made += 1
         else:
             print(f"  No title found, skipping...")
             movie['cast'] = []
         
-        updated_movies.append(movie)
-        
         # Add delay to avoid overwhelming the API
-        if i < len(recent_movies) - 1 and requests_made < max_requests:  # Don't delay after the last item
+        if requested and i < len(recent_movies) - 1 and requests_made < max_requests:  # Don't delay after the last item
             time.sleep(delay)
     
-    # Add the older movies without processing
-    updated_movies.extend(other_movies)
-    
-    # Sort movies by index to maintain original order
-    updated_movies.sort(key=lambda x: x.get('index', 0))
-    
     # Save the updated data
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_movies, f, indent=2, ensure_ascii=False)
+        store.save(output_file)
         print(f"\nUpdated movies data saved to {output_file}")
-        print(f"Successfully processed {len(updated_movies)} movies")
+        print(f"Successfully processed {len(store)} movies")
         print(f"Made {requests_made} API requests for recent movies")
     except Exception as e:
         print(f"Error saving file: {e}")
@@ -133,4 +101,5 @@ if __name__ == "__main__":
     print("Focusing on movies from 1980 onwards")
     print("Limited to 900 requests to stay within free API limits")
     print("=" * 60)
-    update_recent_movies_with_cast("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
\ No newline at end of file
+    update_recent_movies_with_cast("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
+    export_run_metrics('update_recent_cast')
\ No newline at end of file
@@ -1,36 +1,12 @@
 import json
-import requests
 import time
-from urllib.parse import quote_plus
 
-def fetch_movie_cast(movie_title, movie_year=None):
-    """
-    Fetch cast information for a movie using OMDB API
-    """
-    # Using your provided API key
-    api_key = "b5c868a4"
-    
-    # Construct the API URL
-    if movie_year:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&y={movie_year}&apikey={api_key}"
-    else:
-        url = f"http://www.omdbapi.com/?t={quote_plus(movie_title)}&apikey={api_key}"
-    
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('Response') == 'True':
-                # Extract cast information
-                cast = data.get('Actors', '')
-                if cast:
-                    # Split cast into a list
-                    cast_list = [actor.strip() for actor in cast.split(',')]
-                    return cast_list
-        return []
-    except Exception as e:
-        # print(f"Error fetching data for {movie_title}: {e}")
-        return []
+from catalog_stream import save_catalog
+from metrics import export_run_metrics
+from omdb_client import fetch_movie_cast
+
+# Using your provided API key
+API_KEY = "b5c868a4"
 
 def add_sample_cast_data(movies):
     """
@@ -76,7 +52,7 @@ def add_sample_cast_data(movies):
             # Try to fetch from OMDB for recent movies
             year = movie.get('year', '')
             if year and year.isdigit() and int(year) >= 2010:
-                cast = fetch_movie_cast(title, year)
+                cast = fetch_movie_cast(title, year, api_key=API_KEY)
                 if cast:
                     movie['cast'] = cast
                     print(f"Fetched cast for: {title} ({year})")
@@ -115,8 +91,7 @@ def update_movies_with_cast(input_file, output_file):
     
     # Save the updated data
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(updated_movies, f, indent=2, ensure_ascii=False)
+        save_catalog(output_file, updated_movies)
         print(f"\nUpdated movies data saved to {output_file}")
         print(f"Successfully processed {len(updated_movies)} movies")
     except Exception as e:
@@ -128,4 +103,5 @@ if __name__ == "__main__":
     print("Using API Key: b5c868a4")
     print("Adding sample cast data for popular recent movies")
     print("=" * 50)
-    update_movies_with_cast("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
\ No newline at end of file
+    update_movies_with_cast("imdb_tamil_movies_full.json", "imdb_tamil_movies_with_cast.json")
+    export_run_metrics('update_with_sample_cast')
\ No newline at end of file
@@ -0,0 +1,166 @@
+// Catalog loading shared by the home, movie and favorites pages
+
+// Fetch and parse a JSON file
+function fetchJson(url, options) {
+    return fetch(url, options)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Could not load ${url}`);
+            }
+            return response.json();
+        });
+}
+
+// Load the whole catalog through the export manifest so the browser gets the
+// minified, content-hashed copy, patching the copy cached by an earlier visit
+// with the published deltas when it can; fall back to the plain JSON file
+function fetchCatalog() {
+    return fetchJson('imdb_tamil_movies_with_cast.manifest.json', { cache: 'no-cache' })
+        .then(manifest => loadCachedCatalog(manifest)
+            .then(records => records || fetchJson(manifest.file)
+                .then(records => {
+                    storeCatalog(manifest, records);
+                    return records;
+                })))
+        .catch(() => fetchJson('imdb_tamil_movies_with_cast.json'));
+}
+
+// The last catalog loaded, with its version and hash, kept in the Cache API
+// (it is too large for localStorage); not available outside secure contexts
+const CATALOG_CACHE = 'tamil-movies-catalog';
+const CACHED_CATALOG_URL = 'cached-catalog.json';
+
+function readCachedCatalog() {
+    if (!window.caches) {
+        return Promise.resolve(null);
+    }
+    return caches.open(CATALOG_CACHE)
+        .then(cache => cache.match(CACHED_CATALOG_URL))
+        .then(response => response ? response.json() : null);
+}
+
+function storeCatalog(manifest, records) {
+    if (!window.caches) {
+        return;
+    }
+    const body = JSON.stringify({ version: manifest.version, hash: manifest.hash, records });
+    caches.open(CATALOG_CACHE)
+        .then(cache => cache.put(CACHED_CATALOG_URL,
+            new Response(body, { headers: { 'Content-Type': 'application/json' } })))
+        .catch(error => console.warn('Catalog not cached:', error.message));
+}
+
+// The cached catalog brought up to the manifest's version, null when there is
+// none or a delta it needs is no longer published
+function loadCachedCatalog(manifest) {
+    return readCachedCatalog()
+        .then(cached => {
+            if (!cached) {
+                return null;
+            }
+            if (cached.hash === manifest.hash) {
+                return cached.records;
+            }
+            const versions = [];
+            for (let version = cached.version + 1; version <= manifest.version; version++) {
+                versions.push(version);
+            }
+            if (!versions.length || !versions.every(version => (manifest.deltas || []).includes(version))) {
+                return null;
+            }
+            return Promise.all(versions.map(version => fetchJson(`imdb_tamil_movies_with_cast.delta.${version}.json`)))
+                .then(deltas => {
+                    const records = deltas.reduce(applyDelta, cached.records);
+                    storeCatalog(manifest, records);
+                    return records;
+                });
+        })
+        .catch(error => {
+            console.warn('Loading the full catalog:', error.message);
+            return null;
+        });
+}
+
+// Patch the records of one version into the next, as catalog_delta.apply_delta does
+function applyDelta(records, delta) {
+    const byIndex = new Map(records.map(movie => [movie.index, movie]));
+    delta.removed.forEach(index => byIndex.delete(index));
+    delta.added.concat(delta.changed).forEach(movie => byIndex.set(movie.index, movie));
+    if (delta.order) {
+        return delta.order.map(index => byIndex.get(index));
+    }
+    return [...byIndex.values()].sort((a, b) => (a.index || 0) - (b.index || 0));
+}
+
+// Fetch one movie's document written by tamil/catalog_shards.py
+function fetchMovieShard(id) {
+    return fetch(`movies/${id}.json`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('No shard for movie ' + id);
+            }
+            return response.json();
+        });
+}
+
+// Whether the static detail pages from tamil/prerender_movies.py are published;
+// it renders every movie of the catalog, so one check covers all of them
+let prerenderedPages = false;
+
+function checkPrerenderedPages() {
+    return fetch('movie/manifest.json', { method: 'HEAD', cache: 'no-cache' })
+        .then(response => {
+            prerenderedPages = response.ok;
+        })
+        .catch(() => {
+            prerenderedPages = false;
+        });
+}
+
+// Detail page of a movie: its prerendered page, or the page that loads it client-side
+function movieUrl(movie) {
+    return prerenderedPages ? `movie/${movie.index}.html` : `movie.html?id=${movie.index}`;
+}
+
+// Blur placeholders by movie index, written by tamil/poster_assets.py next to
+// the catalog rather than inside it so the catalog stays small
+let placeholders = new Map();
+
+// Load the placeholders alongside the catalog; cards drawn before they
+// arrive get theirs unless the thumbnail is already showing
+function loadPlaceholders() {
+    fetch('assets/placeholders.json')
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('No placeholders');
+            }
+            return response.json();
+        })
+        .then(data => {
+            placeholders = new Map(Object.entries(data).map(([index, uri]) => [Number(index), uri]));
+            document.querySelectorAll('.movie-card img[srcset]').forEach(img => {
+                const placeholder = placeholders.get(Number(img.closest('.movie-card').dataset.id));
+                if (placeholder && !img.complete) {
+                    img.style.backgroundImage = `url('${placeholder}')`;
+                    img.style.backgroundSize = 'cover';
+                }
+            });
+        })
+        .catch(error => console.warn('Cards without placeholders:', error.message));
+}
+
+// Card image: the local WebP thumbnails written by tamil/poster_assets.py, with the
+// blurred placeholder (from the movie's shard or assets/placeholders.json) showing
+// until they load; the remote image when there are none
+function cardImageAttributes(movie) {
+    if (!movie.thumbnails) {
+        return `src="${movie.image || 'https://via.placeholder.com/300x450?text=No+Image'}"`;
+    }
+    const widths = Object.keys(movie.thumbnails).map(Number).sort((a, b) => a - b);
+    const srcset = widths.map(width => `${movie.thumbnails[width]} ${width}w`).join(', ');
+    const src = movie.thumbnails[widths.find(width => width >= 320) || widths[widths.length - 1]];
+    const uri = movie.placeholder || placeholders.get(movie.index);
+    const placeholder = uri ? ` style="background-image: url('${uri}'); background-size: cover;"` : '';
+    return `src="${src}" srcset="${srcset}" sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw" ` +
+        `loading="lazy" decoding="async"${placeholder}`;
+}
@@ -22,20 +22,18 @@ document.addEventListener('DOMContentLoaded', () => {
 
 // Load favorite movies
 function loadFavoriteMovies() {
-    // Load movies from JSON
-    fetch('imdb_tamil_movies_with_cast.json')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Network response was not ok');
-            }
-            return response.json();
-        })
-        .then(data => {
-            // Get favorite movie IDs from localStorage
-            const favoriteIds = JSON.parse(localStorage.getItem('favoriteMovies')) || [];
-            
-            // Filter movies to only include favorites
-            favoriteMovies = data.filter(movie => favoriteIds.includes(movie.index));
+    // Get favorite movie IDs from localStorage
+    const favoriteIds = JSON.parse(localStorage.getItem('favoriteMovies')) || [];
+    
+    // Load just the favorites, or filter the whole catalog if a shard is missing;
+    // the shards carry the blur placeholders, so assets/placeholders.json isn't needed here
+    const favorites = Promise.all(favoriteIds.map(fetchMovieShard))
+        .catch(() => fetchCatalog()
+            .then(data => data.filter(movie => favoriteIds.includes(movie.index))));
+    // The cards link to the prerendered pages when they are published
+    Promise.all([favorites, checkPrerenderedPages()])
+        .then(([movies]) => {
+            favoriteMovies = movies;
             
             // Update movie count
             updateMovieCount();
@@ -152,7 +150,7 @@ function createFavoriteMovieCard(movie) {
     
     card.innerHTML = `
         <div class="relative">
-            <img src="${movie.image || 'https://via.placeholder.com/300x450?text=No+Image'}" 
+            <img ${cardImageAttributes(movie)}
                  alt="${movie.title}" 
                  class="w-full h-64 object-cover">
             <button class="remove-favorite-btn absolute top-2 right-2 p-2 rounded-full bg-white dark:bg-gray-700 shadow-md text-red-600 hover:bg-red-100 transition-colors"
@@ -169,7 +167,7 @@ function createFavoriteMovieCard(movie) {
             <p class="text-gray-600 dark:text-gray-400 text-sm mb-3">${movie.year}</p>
             <div class="flex justify-between items-center">
                 <span class="text-xs bg-gray-200 dark:bg-gray-700 px-2 py-1 rounded">${movie.genre.split(',')[0] || 'Drama'}</span>
-                <button class="text-sm text-red-600 hover:text-red-800 font-medium">View Details</button>
+                <a href="${movieUrl(movie)}" class="text-sm text-red-600 hover:text-red-800 font-medium">View Details</a>
             </div>
         </div>
     `;
@@ -183,7 +181,7 @@ function createFavoriteMovieCard(movie) {
     
     // Add click event to card
     card.addEventListener('click', () => {
-        window.location.href = `movie.html?id=${movie.index}`;
+        window.location.href = movieUrl(movie);
     });
     
     return card;
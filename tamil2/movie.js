@@ -27,17 +27,12 @@ document.addEventListener('DOMContentLoaded', () => {
 
 // Load movie details
 function loadMovieDetails() {
-    // Load movies from JSON
-    fetch('imdb_tamil_movies_with_cast.json')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Network response was not ok');
-            }
-            return response.json();
-        })
-        .then(data => {
-            // Find the movie with the matching ID
-            currentMovie = data.find(movie => movie.index === movieId);
+    // Load just this movie, or find it in the whole catalog
+    fetchMovieShard(movieId)
+        .catch(() => fetchCatalog()
+            .then(data => data.find(movie => movie.index === movieId)))
+        .then(movie => {
+            currentMovie = movie;
             
             if (!currentMovie) {
                 // If movie not found, redirect to home
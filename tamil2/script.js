@@ -11,6 +11,8 @@ const genreChips = document.querySelectorAll('.genre-chip');
 let movies = [];
 let filteredMovies = [];
 let currentGenre = 'All';
+let moviesByIndex = new Map();
+let searchIndex = null;
 
 // Initialize the app
 document.addEventListener('DOMContentLoaded', () => {
@@ -26,16 +28,14 @@ document.addEventListener('DOMContentLoaded', () => {
 
 // Load movies from JSON file
 function loadMovies() {
-    fetch('imdb_tamil_movies_with_cast.json')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Network response was not ok');
-            }
-            return response.json();
-        })
-        .then(data => {
+    loadPlaceholders();
+    // The cards link to the prerendered pages when they are published
+    Promise.all([fetchCatalog(), checkPrerenderedPages()])
+        .then(([data]) => {
             movies = data;
             filteredMovies = [...movies];
+            moviesByIndex = new Map(movies.map(movie => [movie.index, movie]));
+            loadSearchIndex();
             
             // Update movie count
             updateMovieCount();
@@ -50,6 +50,133 @@ function loadMovies() {
         });
 }
 
+// Load the inverted index built by tamil/search_index.py; without it
+// search falls back to scanning every movie
+function loadSearchIndex() {
+    fetch('imdb_tamil_movies_with_cast.search.json', { cache: 'no-cache' })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('No search index');
+            }
+            return response.json();
+        })
+        .then(data => {
+            // An index built from another version of the catalog would give wrong results
+            if (data.records !== movies.length) {
+                throw new Error('Search index does not match the catalog');
+            }
+            const postings = entries => entries.map(([key, gaps]) => {
+                let previous = 0;
+                return [key, gaps.map(gap => (previous += gap))];
+            });
+            const tokens = postings(data.tokens);
+            searchIndex = {
+                tokens: tokens.map(([token]) => token),
+                postings: tokens.map(([, indexes]) => indexes),
+                genres: new Map(postings(data.genres))
+            };
+        })
+        .catch(error => {
+            console.warn('Searching without an index:', error.message);
+            searchIndex = null;
+        });
+}
+
+// Same tokenizing rule as tamil/search_index.py
+function tokenize(text) {
+    return text.toLowerCase().match(/[\p{L}\p{N}]+/gu) || [];
+}
+
+// Sorted indexes of the movies having a token that starts with `prefix`
+function prefixPostings(prefix) {
+    const tokens = searchIndex.tokens;
+    let low = 0;
+    let high = tokens.length;
+    while (low < high) {
+        const mid = (low + high) >> 1;
+        if (tokens[mid] < prefix) {
+            low = mid + 1;
+        } else {
+            high = mid;
+        }
+    }
+    // A single matching token needs no merge
+    if (low < tokens.length && tokens[low].startsWith(prefix) &&
+        !(low + 1 < tokens.length && tokens[low + 1].startsWith(prefix))) {
+        return searchIndex.postings[low];
+    }
+    const matches = new Set();
+    for (let i = low; i < tokens.length && tokens[i].startsWith(prefix); i++) {
+        searchIndex.postings[i].forEach(index => matches.add(index));
+    }
+    return [...matches].sort((a, b) => a - b);
+}
+
+// Indexes present in both sorted lists
+function intersect(a, b) {
+    const result = [];
+    let i = 0;
+    let j = 0;
+    while (i < a.length && j < b.length) {
+        if (a[i] === b[j]) {
+            result.push(a[i]);
+            i++;
+            j++;
+        } else if (a[i] < b[j]) {
+            i++;
+        } else {
+            j++;
+        }
+    }
+    return result;
+}
+
+// Movies matching every search term as a word prefix and the current genre,
+// or null when there is no index to answer from
+function searchWithIndex(searchTerm) {
+    const terms = tokenize(searchTerm);
+    if (!searchIndex || (terms.length === 0 && searchTerm.trim() !== '')) {
+        return null;
+    }
+    let result = null;
+    terms.forEach(term => {
+        const matches = prefixPostings(term);
+        result = result === null ? matches : intersect(result, matches);
+    });
+    if (currentGenre !== 'All') {
+        const matches = searchIndex.genres.get(currentGenre) || [];
+        result = result === null ? matches : intersect(result, matches);
+    }
+    if (result === null) {
+        return [...movies];
+    }
+    return result.map(index => moviesByIndex.get(index)).filter(Boolean);
+}
+
+// Apply the search term and genre to the whole catalog
+function applyFilters() {
+    const searchTerm = searchInput.value.toLowerCase();
+    const indexed = searchWithIndex(searchTerm);
+    if (indexed !== null) {
+        filteredMovies = indexed;
+    } else {
+        filteredMovies = movies.filter(movie => 
+            !searchTerm ||
+            movie.title.toLowerCase().includes(searchTerm) ||
+            movie.director.toLowerCase().includes(searchTerm) ||
+            movie.cast.some(actor => actor.toLowerCase().includes(searchTerm))
+        );
+        if (currentGenre !== 'All') {
+            filteredMovies = filteredMovies.filter(movie => 
+                movie.genre.includes(currentGenre)
+            );
+        }
+    }
+    
+    renderMovies();
+    updateMovieCount();
+}
+
 // Fallback sample data
 function loadSampleData() {
     movies = [
@@ -124,27 +251,7 @@ function setupEventListeners() {
 
 // Handle search input
 function handleSearch(e) {
-    const searchTerm = e.target.value.toLowerCase();
-    
-    if (searchTerm === '') {
-        filteredMovies = [...movies];
-    } else {
-        filteredMovies = movies.filter(movie => 
-            movie.title.toLowerCase().includes(searchTerm) ||
-            movie.director.toLowerCase().includes(searchTerm) ||
-            movie.cast.some(actor => actor.toLowerCase().includes(searchTerm))
-        );
-    }
-    
-    // Apply current genre filter
-    if (currentGenre !== 'All') {
-        filteredMovies = filteredMovies.filter(movie => 
-            movie.genre.includes(currentGenre)
-        );
-    }
-    
-    renderMovies();
-    updateMovieCount();
+    applyFilters();
 }
 
 // Handle sorting
@@ -171,26 +278,7 @@ function handleSort() {
 
 // Filter by genre
 function filterByGenre() {
-    if (currentGenre === 'All') {
-        filteredMovies = [...movies];
-    } else {
-        filteredMovies = movies.filter(movie => 
-            movie.genre.includes(currentGenre)
-        );
-    }
-    
-    // Apply search filter if there's a search term
-    const searchTerm = searchInput.value.toLowerCase();
-    if (searchTerm) {
-        filteredMovies = filteredMovies.filter(movie => 
-            movie.title.toLowerCase().includes(searchTerm) ||
-            movie.director.toLowerCase().includes(searchTerm) ||
-            movie.cast.some(actor => actor.toLowerCase().includes(searchTerm))
-        );
-    }
-    
-    renderMovies();
-    updateMovieCount();
+    applyFilters();
 }
 
 // Update movie count display
@@ -227,7 +315,7 @@ function createMovieCard(movie) {
     
     card.innerHTML = `
         <div class="relative">
-            <img src="${movie.image || 'https://via.placeholder.com/300x450?text=No+Image'}" 
+            <img ${cardImageAttributes(movie)}
                  alt="${movie.title}" 
                  class="w-full h-64 object-cover">
             <button class="favorite-btn absolute top-2 right-2 p-2 rounded-full bg-white dark:bg-gray-700 shadow-md ${isFavorited ? 'favorited' : ''}"
@@ -244,7 +332,7 @@ function createMovieCard(movie) {
             <p class="text-gray-600 dark:text-gray-400 text-sm mb-3">${movie.year}</p>
             <div class="flex justify-between items-center">
                 <span class="text-xs bg-gray-200 dark:bg-gray-700 px-2 py-1 rounded">${movie.genre.split(',')[0] || 'Drama'}</span>
-                <button class="text-sm text-red-600 hover:text-red-800 font-medium">View Details</button>
+                <a href="${movieUrl(movie)}" class="text-sm text-red-600 hover:text-red-800 font-medium">View Details</a>
             </div>
         </div>
     `;
@@ -258,7 +346,7 @@ function createMovieCard(movie) {
     
     // Add click event to card
     card.addEventListener('click', () => {
-        window.location.href = `movie.html?id=${movie.index}`;
+        window.location.href = movieUrl(movie);
     });
     
     return card;
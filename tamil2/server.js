@@ -13,6 +13,7 @@ const MIME_TYPES = {
   '.jpg': 'image/jpeg',
   '.gif': 'image/gif',
   '.svg': 'image/svg+xml',
+  '.webp': 'image/webp',
   '.ico': 'image/x-icon'
 };
 
@@ -46,6 +47,22 @@ const server = http.createServer((req, res) => {
     headers['Access-Control-Allow-Methods'] = 'GET';
   }
   
+  // Content-hashed exports from catalog_export.py and poster_assets.py thumbnails never change, let browsers keep them
+  if (/\.[0-9a-f]{12}\.min\.json$/.test(filePath) || /[\\/]assets[\\/].*-\d+\.webp$/.test(filePath)) {
+    headers['Cache-Control'] = 'public, max-age=31536000, immutable';
+  }
+
+  // Serve the precompressed .br/.gz sibling when the browser accepts it
+  const acceptEncoding = req.headers['accept-encoding'] || '';
+  for (const [encoding, suffix] of [['br', '.br'], ['gzip', '.gz']]) {
+    if (acceptEncoding.includes(encoding) && fs.existsSync(filePath + suffix)) {
+      filePath += suffix;
+      headers['Content-Encoding'] = encoding;
+      headers['Vary'] = 'Accept-Encoding';
+      break;
+    }
+  }
+
   fs.readFile(filePath, (error, content) => {
     if (error) {
       if (error.code === 'ENOENT') {